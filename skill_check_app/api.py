@@ -0,0 +1,343 @@
+"""
+Headless HTTP API for the analyzer, rewriter and PDF exporter.
+
+Run from the repository root (templates are resolved relative to it):
+    python skill_check_app/api.py            # or: API_PORT=8080 python ...
+
+CPU-bound parsing / export runs in a process pool, LLM calls in a thread
+pool. Both pools are bounded: when their queue is full the API answers
+429 with Retry-After instead of piling up work.
+"""
+import os
+import time
+import uuid
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, Response
+
+load_dotenv()
+
+# Internal Modules
+from modules.parser import parse_document_bytes
+from modules.analyzer import analyze_resume_vs_jd
+from modules.rewriter import TEMPLATES, rewrite_full_resume_html
+from modules.exporter import export_html_to_pdf_bytes
+from modules.cache import BoundedCache
+
+
+# ======================================================
+# Settings (env overridable)
+# ======================================================
+CPU_WORKERS = int(os.getenv("API_CPU_WORKERS", str(os.cpu_count() or 2)))
+CPU_QUEUE = int(os.getenv("API_CPU_QUEUE", "32"))
+LLM_WORKERS = int(os.getenv("API_LLM_WORKERS", "16"))
+LLM_QUEUE = int(os.getenv("API_LLM_QUEUE", "64"))
+MAX_UPLOAD_BYTES = int(float(os.getenv("API_MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+RETRY_AFTER_S = os.getenv("API_RETRY_AFTER", "2")
+
+
+# ======================================================
+# Bounded worker pools
+# ======================================================
+class QueueFull(Exception):
+    pass
+
+
+class BoundedPool:
+    """
+    Executor wrapper that refuses work once max_pending tasks are queued
+    or running. Only touched from the event loop thread, so the counter
+    needs no lock.
+    """
+
+    def __init__(self, name: str, executor, max_pending: int):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def full(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def acquire(self):
+        """
+        Take a slot or raise QueueFull. Pair with release().
+        """
+        if self.full():
+            self.rejected += 1
+            raise QueueFull(self.name)
+        self.pending += 1
+
+    def release(self):
+        self.pending -= 1
+
+    @asynccontextmanager
+    async def reserve(self):
+        """
+        Hold a slot while the work for this pool is being prepared (e.g.
+        parsing uploads), so a full pool rejects the request up front.
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def submit(self, fn, *args, **kwargs):
+        """
+        Run fn in a slot already held via reserve().
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        async with self.reserve():
+            return await self.submit(fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+pools = {}
+_background = set()
+
+# Results of async (?mode=async) requests, bounded like the other caches
+JOBS = BoundedCache("api_jobs", max_entries=int(os.getenv("API_JOB_RESULTS", "1000")))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pools["cpu"] = BoundedPool("cpu", ProcessPoolExecutor(max_workers=CPU_WORKERS), CPU_QUEUE)
+    pools["llm"] = BoundedPool("llm", ThreadPoolExecutor(max_workers=LLM_WORKERS), LLM_QUEUE)
+    yield
+    for pool in pools.values():
+        pool.executor.shutdown(wait=False, cancel_futures=True)
+    pools.clear()
+
+
+app = FastAPI(title="AI Resume Analyzer API", lifespan=lifespan)
+
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request, exc: QueueFull):
+    return JSONResponse(
+        status_code=429,
+        content={"error": f"{exc} queue is full, retry later"},
+        headers={"Retry-After": RETRY_AFTER_S},
+    )
+
+
+# ======================================================
+# Helpers
+# ======================================================
+async def read_upload(file: UploadFile) -> bytes:
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"{file.filename} exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    return data
+
+
+async def parse_upload(filename: str, data: bytes) -> str:
+    text = await pools["cpu"].run(parse_document_bytes, filename, data)
+    if not text.strip():
+        raise HTTPException(422, f"Could not parse {filename} (PDF / DOCX / TXT)")
+    return text
+
+
+async def read_pair(resume: UploadFile, jd: UploadFile):
+    """
+    Read both uploads up front: in async mode the request (and its
+    temp files) is gone before the job runs.
+    """
+    return (
+        (resume.filename or "", await read_upload(resume)),
+        (jd.filename or "", await read_upload(jd)),
+    )
+
+
+def split_skills(value: str) -> list:
+    return [s.strip() for s in (value or "").split(",") if s.strip()]
+
+
+async def run_or_enqueue(mode: str, coro_fn):
+    """
+    Run coro_fn holding an LLM slot, taken before any work is done (so no
+    CPU is spent parsing requests that would be rejected anyway).
+    mode=sync  → await the work and return its result.
+    mode=async → 202 + job id; poll GET /jobs/{id}.
+    """
+    if mode != "async":
+        async with pools["llm"].reserve():
+            return await coro_fn()
+
+    # Backpressure applies before accepting the job, not after: the slot
+    # is taken here and handed over to the background task
+    pools["llm"].acquire()
+
+    job_id = uuid.uuid4().hex
+    JOBS.put(job_id, {"status": "running", "submitted_at": time.time()})
+
+    async def runner():
+        try:
+            result = await coro_fn()
+            JOBS.put(job_id, {"status": "done", "result": result})
+        except QueueFull as e:
+            JOBS.put(job_id, {"status": "rejected", "error": f"{e} queue is full"})
+        except HTTPException as e:
+            JOBS.put(job_id, {"status": "failed", "error": e.detail})
+        except Exception as e:
+            JOBS.put(job_id, {"status": "failed", "error": str(e)})
+        finally:
+            pools["llm"].release()
+
+    # Keep a reference so the task isn't garbage collected mid-flight
+    task = asyncio.create_task(runner())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "running"})
+
+
+# ======================================================
+# Endpoints
+# ======================================================
+@app.get("/health")
+async def health():
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown or expired job id")
+    return job
+
+
+@app.post("/analyze")
+async def analyze(
+    resume: UploadFile = File(...),
+    jd: UploadFile = File(...),
+    provider: str = Form("groq"),
+    model: str = Form("llama-3.3-70b-versatile"),
+    include_text: bool = Form(False),
+    adaptive_routing: bool = Form(False),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    x_groq_api_key: str = Header(""),
+    x_gemini_api_key: str = Header(""),
+):
+    resume_upload, jd_upload = await read_pair(resume, jd)
+
+    async def work():
+        # Runs in the LLM slot taken by run_or_enqueue
+        resume_text, jd_text = await asyncio.gather(
+            parse_upload(*resume_upload), parse_upload(*jd_upload)
+        )
+
+        result = await pools["llm"].submit(
+            analyze_resume_vs_jd,
+            resume_text=resume_text,
+            jd_text=jd_text,
+            provider=provider,
+            model=model,
+            groq_api_key=x_groq_api_key,
+            gemini_api_key=x_gemini_api_key,
+            adaptive_routing=adaptive_routing,
+        )
+        if "error" in result:
+            raise HTTPException(502, result["error"])
+
+        body = {"analysis": result}
+        if include_text:
+            body["resume_text"] = resume_text
+            body["jd_text"] = jd_text
+        return body
+
+    return await run_or_enqueue(mode, work)
+
+
+@app.post("/rewrite")
+async def rewrite(
+    resume: UploadFile = File(...),
+    jd: UploadFile = File(...),
+    provider: str = Form("groq"),
+    model: str = Form("llama-3.3-70b-versatile"),
+    template: str = Form("professional"),
+    matched_skills: str = Form(""),
+    missing_skills: str = Form(""),
+    fit_score: float = Form(0),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    x_groq_api_key: str = Header(""),
+    x_gemini_api_key: str = Header(""),
+):
+    if template not in TEMPLATES:
+        raise HTTPException(422, f"Unknown template '{template}'. Use: {', '.join(TEMPLATES)}")
+
+    resume_upload, jd_upload = await read_pair(resume, jd)
+
+    async def work():
+        resume_text, jd_text = await asyncio.gather(
+            parse_upload(*resume_upload), parse_upload(*jd_upload)
+        )
+
+        html = await pools["llm"].submit(
+            rewrite_full_resume_html,
+            resume_text=resume_text,
+            jd_text=jd_text,
+            matched_skills=split_skills(matched_skills),
+            missing_skills=split_skills(missing_skills),
+            similarity_score=fit_score,
+            provider=provider,
+            model=model,
+            template=template,
+            groq_api_key=x_groq_api_key,
+            gemini_api_key=x_gemini_api_key,
+        )
+        if html.startswith("<!-- Resume Rewrite Error"):
+            raise HTTPException(502, html.removeprefix("<!-- Resume Rewrite Error:").removesuffix("-->").strip())
+        return {"html": html}
+
+    return await run_or_enqueue(mode, work)
+
+
+@app.post("/export")
+async def export(
+    html: str = Form(None),
+    html_file: UploadFile = File(None),
+):
+    if html is None and html_file is None:
+        raise HTTPException(422, "Provide 'html' or 'html_file'")
+
+    if html is None:
+        html = (await read_upload(html_file)).decode("utf-8", errors="ignore")
+
+    pdf = await pools["cpu"].run(export_html_to_pdf_bytes, html)
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="resume.pdf"'},
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.getenv("API_HOST", "127.0.0.1"),
+        port=int(os.getenv("API_PORT", "8000")),
+    )
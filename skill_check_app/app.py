@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,13 +10,14 @@ ENV_GEMINI_KEY = os.getenv("GEMINI_API_KEY", "")
 
 # Internal Modules
 from modules.parser import parse_resume, parse_jd
-from modules.analyzer import analyze_resume_vs_jd
+from modules.analyzer import analyze_resume_vs_jd, compile_jd, score_resume_vs_jd, is_fallback_result
 from modules.rewriter import rewrite_full_resume_html
 from modules.exporter import export_html_to_pdf
+from modules.llm_switcher import warm_start, get_ollama_manager
+from modules.cache import cache_stats, content_hash
+from modules.result_store import ResultStore
 
-# External Clients
-import ollama
-import streamlit.components.v1 as components
+# External clients (ollama, streamlit.components) are imported where used
 
 
 # ======================================================
@@ -50,16 +52,44 @@ else:
     groq_key = ""
     gemini_key = ""
 
+adaptive_routing = st.sidebar.checkbox(
+    "⚡ Adaptive model routing",
+    value=False,
+    help="Send clear-cut resume/JD pairs to a smaller, faster model and "
+         "escalate to the selected model only when its output is invalid.",
+)
+
+# Start importing the chosen provider's SDK while the user uploads files
+warm_start(provider)
+
+# Parsed documents, compiled JDs, analyses and provider clients are cached
+# process-wide (modules/cache.py), shared by every session.
+with st.sidebar.expander("🗄️ Shared cache"):
+    for c in cache_stats():
+        st.caption(
+            f"{c['name']}: {c['entries']}/{c['max_entries']} entries · "
+            f"{c['bytes'] / 1e6:.1f}/{c['max_bytes'] / 1e6:.0f} MB · "
+            f"{c['hits']} hits / {c['misses']} misses"
+        )
 
-# Fetch Ollama Models
+
+# Fetch Ollama Models (the shared manager caches the list, and failures,
+# for 60 s, so reruns don't hit the server every time)
 def fetch_ollama_models():
     try:
-        return sorted([m["name"] for m in ollama.list()["models"]])
+        return get_ollama_manager().list_models() or ["mistral", "llama3", "mixtral"]
     except:
         return ["mistral", "llama3", "mixtral"]
 
 
 
+# Persistent result store, one per process
+@st.cache_resource
+def get_result_store():
+    return ResultStore(os.getenv("RESULT_STORE_DB", os.path.join("outputs", "results.db")))
+
+
+
 # ======================================================
 # TAB 1 — ANALYZER
 # ======================================================
@@ -87,6 +117,18 @@ with tabs[0]:
 
     model = st.selectbox("Available Model", model_list)
 
+    # Load the model into Ollama now (background) so the first analysis
+    # doesn't wait for it; a no-op while it stays resident
+    if provider == "ollama":
+        get_ollama_manager().preload(model)
+
+    stable_scores = st.checkbox(
+        "🎯 Stable scores (self-consistency)",
+        value=False,
+        help="Sample short score-only calls in parallel until ATS/Fit scores "
+             "converge, and report them with a 95% confidence interval.",
+    )
+
 
     # === RUN ANALYSIS ===
     if st.button("Analyze Resume vs JD", type="primary", use_container_width=True):
@@ -115,19 +157,57 @@ with tabs[0]:
         st.header("3️⃣ LLM ATS Analysis")
 
         with st.spinner("Analyzing resume vs JD using LLM…"):
-            result = analyze_resume_vs_jd(
-                resume_text=resume_text,
-                jd_text=jd_text,
-                provider=provider,
-                model=model,
-                groq_api_key=groq_key,
-                gemini_api_key=gemini_key
-            )
+            # Full analysis and score sampling run side by side
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                analysis_future = pool.submit(
+                    analyze_resume_vs_jd,
+                    resume_text=resume_text,
+                    jd_text=jd_text,
+                    provider=provider,
+                    model=model,
+                    groq_api_key=groq_key,
+                    gemini_api_key=gemini_key,
+                    adaptive_routing=adaptive_routing,
+                )
+                score_future = pool.submit(
+                    score_resume_vs_jd,
+                    resume_text=resume_text,
+                    jd_text=jd_text,
+                    provider=provider,
+                    model=model,
+                    groq_api_key=groq_key,
+                    gemini_api_key=gemini_key,
+                ) if stable_scores else None
+
+                result = analysis_future.result()
+                scores = score_future.result() if score_future else None
 
         if "error" in result:
             st.error(result["error"])
             st.stop()
 
+        if scores and "error" not in scores:
+            result["ats_score"] = scores["ats_score"]
+            result["fit_score"] = scores["fit_score"]
+            result["score_samples"] = scores["samples"]
+            result["ats_ci"] = scores["ats_ci"]
+            result["fit_ci"] = scores["fit_ci"]
+
+        # Persist for later querying / ranking; a fallback must not replace
+        # a good stored analysis of the same resume/JD/model
+        jd_hash = compile_jd(jd_text)["jd_hash"]
+        if is_fallback_result(result):
+            st.warning("The model returned invalid JSON; scores below are placeholders. Try again.")
+        else:
+            get_result_store().save(
+                result,
+                jd_hash=jd_hash,
+                resume_hash=content_hash(resume_text),
+                candidate=resume_file.name,
+                provider=provider,
+                model=model,
+            )
+
         # Save for the rewriter
         st.session_state.analysis_done = True
         st.session_state.analysis_result = result
@@ -141,6 +221,13 @@ with tabs[0]:
         col2.metric("Fit Score", result.get("fit_score", 0))
         col3.metric("Keyword Coverage", result.get("keyword_coverage", 0))
 
+        if "score_samples" in result:
+            st.caption(
+                f"Stable scores from {result['score_samples']} samples — 95% CI: "
+                f"ATS {result['ats_ci'][0]}–{result['ats_ci'][1]}, "
+                f"Fit {result['fit_ci'][0]}–{result['fit_ci'][1]}"
+            )
+
         st.subheader("Matched Skills")
         st.write(", ".join(result.get("matched_skills", [])))
 
@@ -160,6 +247,10 @@ with tabs[0]:
         st.subheader("Final Recommendation")
         st.write(result.get("final_recommendation", ""))
 
+        with st.expander("🏆 Top past candidates for this JD"):
+            for row in get_result_store().top_candidates(jd_hash, limit=10):
+                st.write(f"**{row['candidate']}** — Fit {row['fit_score']} · ATS {row['ats_score']}")
+
         # Debug raw text
         st.markdown("---")
         with st.expander("📄 Parsed Resume"):
@@ -201,10 +292,15 @@ with tabs[1]:
                 groq_api_key=st.session_state.groq_key,
                 gemini_api_key=st.session_state.gemini_key,
             )
+            if html_resume.startswith("<!-- Resume Rewrite Error"):
+                st.error(html_resume[5:-4].strip())
+                st.stop()
             st.session_state.rewritten_resume_html = html_resume
 
     html_code = st.session_state.get("rewritten_resume_html", "")
 
+    import streamlit.components.v1 as components
+
     col1, col2 = st.columns(2)
 
     with col1:
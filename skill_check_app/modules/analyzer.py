@@ -1,7 +1,10 @@
 import json
 import re
 from typing import Dict
-from modules.llm_switcher import call_model
+from modules.llm_switcher import call_model, call_model_routed, is_error_response
+from modules.cache import ANALYSIS_CACHE, JD_CACHE, content_hash
+
+INVALID_JSON_FEEDBACK = "LLM returned invalid JSON."
 
 
 # -----------------------------------------------------------------
@@ -35,6 +38,98 @@ def extract_json_safe(text: str) -> dict:
         return {}  # give up → caller handles fallback
 
 
+# -----------------------------------------------------------------
+# Compiled JD: content hash + normalized keyword set
+# -----------------------------------------------------------------
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[a-z]")
+
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by
+can could did do does each etc for from had has have having he her his how i
+if in into is it its may more most must no not of on or other our out over
+per should so some such than that the their them then there these they this
+those through to under up us using we were what when where which while who
+will with within without would you your
+""".split())
+
+
+def extract_keywords(text: str) -> frozenset:
+    return frozenset(
+        w for w in _WORD_RE.findall(text.lower())
+        if len(w) > 1 and w not in _STOPWORDS
+    )
+
+
+def compile_jd(jd_text: str) -> Dict:
+    """
+    Hash + keyword set for a JD, computed once per distinct JD text
+    and shared across sessions.
+    """
+    jd_hash = content_hash(jd_text)
+
+    def build():
+        return {"jd_hash": jd_hash, "keywords": extract_keywords(jd_text)}
+
+    return JD_CACHE.get_or_compute(jd_hash, build)
+
+
+# -----------------------------------------------------------------
+# Local difficulty estimate (for adaptive model routing)
+# -----------------------------------------------------------------
+OVERLAP_CLEARLY_LOW = 0.15
+OVERLAP_CLEARLY_HIGH = 0.55
+
+
+def keyword_overlap(resume_text: str, jd_text: str) -> float:
+    jd_keywords = compile_jd(jd_text)["keywords"]
+    if not jd_keywords:
+        return 0.0
+    return len(jd_keywords & extract_keywords(resume_text)) / len(jd_keywords)
+
+
+def estimate_difficulty(overlap: float) -> float:
+    """
+    0 when keyword overlap is clearly low or clearly high (the verdict is
+    obvious), rising to 1 in the middle of the ambiguous band.
+    """
+    if overlap <= OVERLAP_CLEARLY_LOW or overlap >= OVERLAP_CLEARLY_HIGH:
+        return 0.0
+    half_band = (OVERLAP_CLEARLY_HIGH - OVERLAP_CLEARLY_LOW) / 2
+    return min(overlap - OVERLAP_CLEARLY_LOW, OVERLAP_CLEARLY_HIGH - overlap) / half_band
+
+
+REQUIRED_KEYS = (
+    "ats_score", "fit_score", "keyword_coverage", "matched_skills", "missing_skills",
+    "summary_feedback", "experience_feedback", "missing_keywords", "final_recommendation",
+)
+
+
+def is_valid_analysis(raw: str) -> bool:
+    """
+    Schema check used to reject a small model's output before escalating.
+    """
+    parsed = extract_json_safe(raw)
+    if not isinstance(parsed, dict) or any(k not in parsed for k in REQUIRED_KEYS):
+        return False
+    try:
+        scores_ok = all(0 <= float(parsed[k]) <= 100 for k in ("ats_score", "fit_score"))
+    except (TypeError, ValueError):
+        return False
+    return scores_ok and isinstance(parsed["matched_skills"], list) \
+        and isinstance(parsed["missing_skills"], list)
+
+
+def is_fallback_result(result: Dict) -> bool:
+    """
+    The zero-score placeholder returned when the model's output wasn't valid JSON.
+    """
+    return result.get("summary_feedback") == INVALID_JSON_FEEDBACK
+
+
+def _is_cacheable(result: Dict) -> bool:
+    return "error" not in result and not is_fallback_result(result)
+
+
 # -----------------------------------------------------------------
 # LLM-powered ATS Analysis (JSON Output)
 # -----------------------------------------------------------------
@@ -44,9 +139,49 @@ def analyze_resume_vs_jd(
     provider: str,
     model: str,
     groq_api_key: str = "",
-    gemini_api_key: str = ""
+    gemini_api_key: str = "",
+    use_cache: bool = True,
+    adaptive_routing: bool = False,
+) -> Dict:
+    """
+    Results are shared across sessions through ANALYSIS_CACHE, keyed on
+    the resume/JD content and provider/model (never on the API key).
+    Provider failures come back with an "error" key and are not cached.
+
+    adaptive_routing sends clear-cut cases to the provider's small model
+    and escalates to `model` if its JSON fails validation.
+    """
+
+    def run() -> Dict:
+        return _run_analysis(resume_text, jd_text, provider, model,
+                             groq_api_key, gemini_api_key, adaptive_routing)
+
+    if not use_cache:
+        return run()
+
+    key = (
+        content_hash(resume_text),
+        compile_jd(jd_text)["jd_hash"],
+        provider.lower(),
+        model,
+        adaptive_routing,
+    )
+    result = ANALYSIS_CACHE.get_or_compute(key, run, cache_if=_is_cacheable)
+
+    # Callers (app.py) mutate nothing today, but hand out a copy anyway
+    return dict(result)
+
+
+def _run_analysis(
+    resume_text: str,
+    jd_text: str,
+    provider: str,
+    model: str,
+    groq_api_key: str = "",
+    gemini_api_key: str = "",
+    adaptive_routing: bool = False,
 ) -> Dict:
-    
+
     prompt = f"""
 You are an ATS Evaluation Engine.
 Return ONLY a clean JSON object. NO commentary.
@@ -79,34 +214,188 @@ JOB DESCRIPTION:
 Now output ONLY the JSON:
 """
 
-    raw = call_model(
-        provider=provider,
-        model=model,
-        prompt=prompt,
-        groq_api_key=groq_api_key,
-        gemini_api_key=gemini_api_key
-    ).strip()
+    if adaptive_routing:
+        raw = call_model_routed(
+            provider=provider,
+            model=model,
+            prompt=prompt,
+            difficulty=estimate_difficulty(keyword_overlap(resume_text, jd_text)),
+            validate=is_valid_analysis,
+            groq_api_key=groq_api_key,
+            gemini_api_key=gemini_api_key
+        ).strip()
+    else:
+        raw = call_model(
+            provider=provider,
+            model=model,
+            prompt=prompt,
+            groq_api_key=groq_api_key,
+            gemini_api_key=gemini_api_key
+        ).strip()
+
+    # Provider failure → surface it (app.py shows result["error"])
+    if is_error_response(raw):
+        return fallback_result(error=raw)
 
     # --- Extract & fix JSON safely ---
     parsed = extract_json_safe(raw)
 
     # If still invalid, fallback
     if not parsed or not isinstance(parsed, dict):
-        parsed = {
-            "ats_score": 0,
-            "fit_score": 0,
-            "keyword_coverage": 0,
-            "matched_skills": [],
-            "missing_skills": [],
-            "summary_feedback": "LLM returned invalid JSON.",
-            "experience_feedback": "",
-            "missing_keywords": [],
-            "final_recommendation": ""
-        }
+        parsed = fallback_result()
 
     return parsed
 
 
+def fallback_result(error: str = None) -> Dict:
+    result = {
+        "ats_score": 0,
+        "fit_score": 0,
+        "keyword_coverage": 0,
+        "matched_skills": [],
+        "missing_skills": [],
+        "summary_feedback": INVALID_JSON_FEEDBACK,
+        "experience_feedback": "",
+        "missing_keywords": [],
+        "final_recommendation": ""
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+
+# -----------------------------------------------------------------
+# Self-consistency scoring (parallel samples, early stopping)
+# -----------------------------------------------------------------
+# Two-sided 95% Student-t critical values by sample count (df = n - 1)
+_T_95 = {2: 12.706, 3: 4.303, 4: 3.182, 5: 2.776, 6: 2.571,
+         7: 2.447, 8: 2.365, 9: 2.306, 10: 2.262}
+
+
+def build_score_prompt(resume_text: str, jd_text: str) -> str:
+    return f"""
+You are an ATS Evaluation Engine.
+Score the RESUME against the JOB DESCRIPTION.
+Return ONLY this JSON, no commentary:
+{{"ats_score": int 0-100, "fit_score": int 0-100}}
+
+RESUME:
+{resume_text}
+
+JOB DESCRIPTION:
+{jd_text}
+"""
+
+
+def confidence_interval(values) -> tuple:
+    """
+    (mean, half_width) of a 95% t-interval.
+    """
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float("inf")
+    sd = (sum((v - mean) ** 2 for v in values) / (n - 1)) ** 0.5
+    return mean, _T_95.get(n, 1.96) * sd / n ** 0.5
+
+
+def _score_sample(prompt: str, provider: str, model: str,
+                  groq_api_key: str, gemini_api_key: str):
+    raw = call_model(provider=provider, model=model, prompt=prompt,
+                     groq_api_key=groq_api_key, gemini_api_key=gemini_api_key)
+    if is_error_response(raw):
+        return raw
+    parsed = extract_json_safe(raw.strip())
+    try:
+        return float(parsed["ats_score"]), float(parsed["fit_score"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def score_resume_vs_jd(
+    resume_text: str,
+    jd_text: str,
+    provider: str,
+    model: str,
+    groq_api_key: str = "",
+    gemini_api_key: str = "",
+    min_samples: int = 3,
+    max_samples: int = 7,
+    wave: int = 2,
+    tolerance: float = 5.0,
+    use_cache: bool = True,
+) -> Dict:
+    """
+    Stable ats/fit scores: issue `min_samples` short score-only calls in
+    parallel, then `wave` more at a time until both 95% CI half-widths
+    are within `tolerance` points or `max_samples` is reached.
+    """
+
+    def run() -> Dict:
+        from concurrent.futures import ThreadPoolExecutor
+
+        prompt = build_score_prompt(resume_text, jd_text)
+        args = (prompt, provider, model, groq_api_key, gemini_api_key)
+        samples, errors = [], []
+
+        with ThreadPoolExecutor(max_workers=max(min_samples, wave)) as pool:
+            issued = 0
+            while issued < max_samples:
+                batch = min(max_samples - issued, min_samples if issued == 0 else wave)
+                futures = [pool.submit(_score_sample, *args) for _ in range(batch)]
+                issued += batch
+
+                for f in futures:
+                    out = f.result()
+                    if isinstance(out, tuple):
+                        samples.append(out)
+                    elif out:
+                        errors.append(out)
+
+                if len(samples) >= min(min_samples, 2):
+                    ats_ci = confidence_interval([a for a, _ in samples])
+                    fit_ci = confidence_interval([f for _, f in samples])
+                    if max(ats_ci[1], fit_ci[1]) <= tolerance:
+                        break
+
+                # Every sample failing at the provider → stop burning calls
+                if errors and not samples:
+                    break
+
+        if not samples:
+            return {"error": errors[0] if errors else INVALID_JSON_FEEDBACK}
+
+        ats_mean, ats_half = confidence_interval([a for a, _ in samples])
+        fit_mean, fit_half = confidence_interval([f for _, f in samples])
+
+        def ci(mean, half):
+            half = min(half, 100.0)
+            return [round(max(0.0, mean - half), 1), round(min(100.0, mean + half), 1)]
+
+        return {
+            "ats_score": round(ats_mean),
+            "fit_score": round(fit_mean),
+            "ats_ci": ci(ats_mean, ats_half),
+            "fit_ci": ci(fit_mean, fit_half),
+            "samples": len(samples),
+            "issued": issued,
+            "converged": max(ats_half, fit_half) <= tolerance,
+        }
+
+    if not use_cache:
+        return run()
+
+    key = (
+        "score",
+        content_hash(resume_text),
+        compile_jd(jd_text)["jd_hash"],
+        provider.lower(),
+        model,
+        min_samples, max_samples, wave, tolerance,
+    )
+    return dict(ANALYSIS_CACHE.get_or_compute(key, run, cache_if=lambda r: "error" not in r))
+
 # from typing import Dict, List
 # from modules.llm_switcher import call_model
 # import json
@@ -0,0 +1,161 @@
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+# ======================================================
+# Helpers
+# ======================================================
+def content_hash(*parts) -> str:
+    """
+    Stable sha256 over str / bytes parts (used for cache + store keys).
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def approx_size(value: Any) -> int:
+    """
+    Rough byte size of cached values (strings, bytes, dicts, lists).
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# ======================================================
+# Process-wide LRU with entry + memory caps
+# ======================================================
+class BoundedCache:
+    """
+    Thread-safe LRU shared by every Streamlit session in the process.
+    Evicts least-recently-used entries past max_entries or max_bytes.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 sizeof: Callable[[Any], int] = approx_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return  # never cache a single value larger than the whole cache
+
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cache_if: Callable[[Any], bool] = None) -> Any:
+        """
+        Return the cached value or compute, store and return it.
+        cache_if lets callers skip caching failed results.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+
+        value = compute()
+        if cache_if is None or cache_if(value):
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# ======================================================
+# Shared caches (caps via env, sizes in MB)
+# ======================================================
+def _mb(env: str, default: int) -> int:
+    return int(float(os.getenv(env, default)) * 1024 * 1024)
+
+
+# Provider clients, keyed by (provider, hash of API key). The raw key is
+# never used as a cache key, and a session only reaches a client by
+# presenting the same key, so clients are isolated per user key.
+CLIENT_CACHE = BoundedCache(
+    "clients",
+    max_entries=int(os.getenv("CLIENT_CACHE_ENTRIES", "32")),
+    sizeof=lambda _: 0,
+)
+
+# Parsed documents, keyed by hash of the uploaded bytes
+DOCUMENT_CACHE = BoundedCache(
+    "documents",
+    max_entries=int(os.getenv("DOCUMENT_CACHE_ENTRIES", "512")),
+    max_bytes=_mb("DOCUMENT_CACHE_MB", 64),
+)
+
+# Compiled JDs (hash + keyword set), keyed by hash of the JD text
+JD_CACHE = BoundedCache(
+    "jds",
+    max_entries=int(os.getenv("JD_CACHE_ENTRIES", "256")),
+    max_bytes=_mb("JD_CACHE_MB", 16),
+)
+
+# Analysis results, keyed by (resume hash, JD hash, provider, model)
+ANALYSIS_CACHE = BoundedCache(
+    "analyses",
+    max_entries=int(os.getenv("ANALYSIS_CACHE_ENTRIES", "1024")),
+    max_bytes=_mb("ANALYSIS_CACHE_MB", 32),
+)
+
+
+def cache_stats() -> list:
+    return [c.stats() for c in (CLIENT_CACHE, DOCUMENT_CACHE, JD_CACHE, ANALYSIS_CACHE)]
@@ -0,0 +1,303 @@
+import os
+import time
+import uuid
+import threading
+from typing import Dict, List, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+from modules.analyzer import is_fallback_result
+from modules.result_store import normalize_skill, as_float, as_int
+
+
+# ======================================================
+# Columnar export of analysis results (Arrow IPC)
+# ======================================================
+# A results directory holds part-*.arrow files in the Arrow IPC file
+# format. Scores are typed columns. Skills, JD hashes and models are
+# dictionary-encoded: each distinct value is stored once per part, and
+# rows hold int32 codes. A writer turns every flushed chunk (chunk_size
+# rows, or the buffer once a save finds it older than max_delay_s) into
+# a finished part:
+# written as .tmp, then renamed, so readers see it at once and never see
+# half a file. A crash loses the rows still buffered; batch runs rebuild
+# them from the job queue (jobqueue.backfill_columnar). compact() merges
+# small parts. Readers memory-map the parts, so loading a large
+# history reads no more than the columns it touches.
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMA = pa.schema([
+    ("created_at", pa.timestamp("ms")),
+    ("jd_hash", _DICT),
+    ("resume_hash", pa.string()),
+    ("candidate", pa.string()),
+    ("provider", _DICT),
+    ("model", _DICT),
+    ("ats_score", pa.int16()),
+    ("fit_score", pa.int16()),
+    ("keyword_coverage", pa.float32()),
+    ("matched_skills", pa.list_(_DICT)),
+    ("missing_skills", pa.list_(_DICT)),
+    ("missing_keywords", pa.list_(_DICT)),
+    ("summary_feedback", pa.string()),
+    ("experience_feedback", pa.string()),
+    ("final_recommendation", pa.string()),
+])
+
+FEEDBACK_COLUMNS = ("summary_feedback", "experience_feedback", "final_recommendation")
+SKILL_COLUMNS = ("matched_skills", "missing_skills", "missing_keywords")
+_DICT_COLUMNS = ("jd_hash", "provider", "model")
+KEY_COLUMNS = ("jd_hash", "resume_hash", "provider", "model")
+
+# .tmp files older than this belong to a crashed writer
+STALE_TMP_S = 3600
+
+
+def _part_name() -> str:
+    return f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.arrow"
+
+
+def _write_part(path: str, batches: List[pa.RecordBatch]) -> str:
+    """
+    Write a finished part atomically (tmp + rename).
+    """
+    final = os.path.join(path, _part_name())
+    with ipc.new_file(final + ".tmp", SCHEMA) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    os.replace(final + ".tmp", final)
+    return final
+
+
+class _Vocab:
+    """
+    Value → int32 code map for one dictionary column of one batch.
+    """
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def dictionary(self) -> pa.Array:
+        return pa.array(self.values, pa.string())
+
+
+class ColumnarWriter:
+    """
+    Appends analyses to a results directory. Thread-safe; save() has the
+    same signature as ResultStore.save so batch runs can feed both.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1000, max_delay_s: float = 60.0,
+                 include_feedback: bool = True):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_delay_s = max_delay_s
+        self.include_feedback = include_feedback
+        self.rows_written = 0
+        self.parts_written = 0
+
+        self._lock = threading.Lock()
+        self._rows: List[Dict] = []
+        self._first_buffered = 0.0
+
+        os.makedirs(path, exist_ok=True)
+
+    # --------------------------------------------------
+    # Writing
+    # --------------------------------------------------
+    def save(self, result: Dict, jd_hash: str, resume_hash: str, candidate: str = "",
+             provider: str = "", model: str = ""):
+        """
+        Errors and invalid-JSON fallbacks are skipped, as in ResultStore.
+        """
+        if "error" in result or is_fallback_result(result):
+            return
+
+        row = {
+            "created_at": int(time.time() * 1000),
+            "jd_hash": jd_hash,
+            "resume_hash": resume_hash,
+            "candidate": candidate,
+            "provider": provider,
+            "model": model,
+            "ats_score": as_int(result.get("ats_score")),
+            "fit_score": as_int(result.get("fit_score")),
+            "keyword_coverage": as_float(result.get("keyword_coverage")),
+        }
+        for col in SKILL_COLUMNS:
+            row[col] = [normalize_skill(s) for s in result.get(col) or [] if str(s).strip()]
+        for col in FEEDBACK_COLUMNS:
+            row[col] = str(result.get(col, "")) if self.include_feedback else None
+
+        with self._lock:
+            if not self._rows:
+                self._first_buffered = time.monotonic()
+            self._rows.append(row)
+            if (len(self._rows) >= self.chunk_size
+                    or time.monotonic() - self._first_buffered >= self.max_delay_s):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush_locked(self):
+        if not self._rows:
+            return
+        batch = self._to_batch(self._rows)
+        _write_part(self.path, [batch])
+        self.rows_written += batch.num_rows
+        self.parts_written += 1
+        self._rows = []
+
+    # --------------------------------------------------
+    # Encoding
+    # --------------------------------------------------
+    @staticmethod
+    def _dict_array(vocab: _Vocab, values: List[str]) -> pa.DictionaryArray:
+        codes = pa.array([vocab.code(v) for v in values], pa.int32())
+        return pa.DictionaryArray.from_arrays(codes, vocab.dictionary())
+
+    def _list_array(self, lists: List[List[str]]) -> pa.ListArray:
+        offsets = [0]
+        flat = []
+        for values in lists:
+            flat.extend(values)
+            offsets.append(len(flat))
+        return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), self._dict_array(_Vocab(), flat))
+
+    def _to_batch(self, rows: List[Dict]) -> pa.RecordBatch:
+        arrays = []
+        for field in SCHEMA:
+            values = [r[field.name] for r in rows]
+            if field.name in _DICT_COLUMNS:
+                arrays.append(self._dict_array(_Vocab(), values))
+            elif field.name in SKILL_COLUMNS:
+                arrays.append(self._list_array(values))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+# ======================================================
+# Reading
+# ======================================================
+def part_files(path: str) -> List[str]:
+    if not os.path.isdir(path):
+        return []
+    return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".arrow"))
+
+
+def read_results(path: str, columns: List[str] = None) -> pa.Table:
+    """
+    Every finished part as one table. The data is memory-mapped, not
+    copied: only the columns you touch are paged in.
+    """
+    tables = []
+    for part in part_files(path):
+        table = ipc.open_file(pa.memory_map(part)).read_all()
+        tables.append(table.select(columns) if columns else table)
+
+    if not tables:
+        schema = pa.schema([SCHEMA.field(c) for c in columns]) if columns else SCHEMA
+        return schema.empty_table()
+    return pa.concat_tables(tables)
+
+
+def row_keys(path: str) -> Set[Tuple[str, str, str, str]]:
+    """
+    (jd_hash, resume_hash, provider, model) of every stored row.
+    """
+    table = read_results(path, list(KEY_COLUMNS))
+    return set(zip(*(table.column(c).to_pylist() for c in KEY_COLUMNS)))
+
+
+def load_results_df(path: str, columns: List[str] = None):
+    """
+    pandas view of read_results; dictionary columns become categoricals.
+    """
+    return read_results(path, columns).to_pandas()
+
+
+def skill_counts(table: pa.Table, column: str = "missing_skills", limit: int = 20) -> List[Dict]:
+    """
+    Most frequent skills in a list column, e.g. the skills most often missing.
+    """
+    counts: Dict[str, int] = {}
+    for chunk in table.column(column).chunks:
+        flat = pc.list_flatten(chunk)
+        # Count int32 codes, then look up each distinct code once
+        names = flat.dictionary.to_pylist()
+        for vc in pc.value_counts(flat.indices).to_pylist():
+            name = names[vc["values"]]
+            counts[name] = counts.get(name, 0) + vc["counts"]
+
+    top = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+    return [{"skill": s, "count": n} for s, n in top]
+
+
+# ======================================================
+# Maintenance
+# ======================================================
+def _part_rows(part: str) -> int:
+    reader = ipc.open_file(pa.memory_map(part))
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def compact(path: str, max_rows: int = 1_000_000) -> Dict[str, int]:
+    """
+    Merge the parts present now into parts of up to max_rows (dictionaries
+    unified per merged part) and sweep .tmp files left by crashed writers.
+    Parts written while this runs are left alone. Readers may briefly see
+    a merged part next to its inputs; run it between batch runs.
+    """
+    now = time.time()
+    for f in os.listdir(path) if os.path.isdir(path) else []:
+        full = os.path.join(path, f)
+        if f.endswith(".tmp") and now - os.path.getmtime(full) > STALE_TMP_S:
+            os.remove(full)
+
+    parts = part_files(path)
+    if len(parts) < 2:
+        return {"parts_in": len(parts), "parts_out": len(parts), "rows_merged": 0}
+
+    groups, group_rows = [[]], 0
+    for part in parts:
+        n = _part_rows(part)
+        if groups[-1] and group_rows + n > max_rows:
+            groups.append([])
+            group_rows = 0
+        groups[-1].append(part)
+        group_rows += n
+
+    rows = 0
+    for group in groups:
+        if len(group) < 2:
+            continue
+        table = pa.concat_tables(ipc.open_file(pa.memory_map(p)).read_all() for p in group)
+        table = table.unify_dictionaries().combine_chunks()
+        _write_part(path, table.to_batches())
+        for p in group:
+            os.remove(p)
+        rows += table.num_rows
+
+    return {"parts_in": len(parts), "parts_out": len(groups), "rows_merged": rows}
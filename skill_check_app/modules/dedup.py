@@ -0,0 +1,247 @@
+import re
+import zlib
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# ======================================================
+# Near-duplicate resume detection (MinHash + LSH)
+# ======================================================
+# Resumes are normalized, cut into word shingles and summarized by a
+# MinHash signature; LSH banding finds candidate near-duplicates without
+# comparing every pair. A near-duplicate of a resume already analyzed
+# against the same JD reuses that analysis (lightly adjusted) instead of
+# calling the LLM again.
+_MERSENNE_61 = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def normalize_text(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def shingles(tokens: List[str], k: int) -> set:
+    if len(tokens) <= k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm whose S-curve
+    midpoint (1/b)^(1/r) is closest to the threshold.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        err = abs(midpoint - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Universal hashing (a*x + b) mod p, one (a, b) per permutation
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(normalize_text(text), self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+
+        hashes = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+        )
+        # a < 2^32 and x < 2^32, so a*x + b stays below 2^64
+        perm = (np.outer(hashes, self._a) + self._b) % _MERSENNE_61
+        return (perm & _MAX_HASH).min(axis=0)
+
+
+def estimate_similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    return float(np.mean(sig1 == sig2))
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128):
+        self.threshold = threshold
+        # Candidates are verified against the threshold anyway, so put the
+        # S-curve midpoint below it: fewer missed duplicates, a few extra checks
+        self.bands, self.rows = optimal_bands(max(0.5, threshold - 0.1), num_perm)
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, sig: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        for i in range(self.bands):
+            yield i, sig[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def add(self, key: str, sig: np.ndarray):
+        self._signatures[key] = sig
+        for i, band in self._band_keys(sig):
+            self._buckets[i].setdefault(band, []).append(key)
+
+    def query(self, sig: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        Most similar indexed key at or above the threshold, or None.
+        """
+        candidates = set()
+        for i, band in self._band_keys(sig):
+            candidates.update(self._buckets[i].get(band, ()))
+
+        best = None
+        for key in candidates:
+            sim = estimate_similarity(sig, self._signatures[key])
+            if sim >= self.threshold and (best is None or sim > best[1]):
+                best = (key, sim)
+        return best
+
+
+# ======================================================
+# Reusing a prior analysis
+# ======================================================
+def contains_phrase(tokens: List[str], phrase: List[str]) -> bool:
+    """
+    Whole-token match, so "go" doesn't match "good" and "c" doesn't match "created".
+    """
+    n = len(phrase)
+    if n == 0:
+        return False
+    return any(tokens[i:i + n] == phrase for i in range(len(tokens) - n + 1))
+
+
+def adjust_analysis(prior: Dict, resume_text: str, source: str, similarity: float) -> Dict:
+    """
+    Cheap local correction of a near-duplicate's analysis: missing skills
+    that now appear in this resume move to matched_skills.
+    """
+    tokens = normalize_text(resume_text)
+    matched = list(prior.get("matched_skills", []))
+    missing = []
+
+    for skill in prior.get("missing_skills", []):
+        if contains_phrase(tokens, normalize_text(str(skill))):
+            matched.append(skill)
+        else:
+            missing.append(skill)
+
+    result = dict(prior)
+    result["matched_skills"] = matched
+    result["missing_skills"] = missing
+    result["dedup_of"] = source
+    result["dedup_similarity"] = round(similarity, 3)
+    return result
+
+
+class Deduplicator:
+    """
+    One LSH index per (JD, provider, model): an analysis is only reused for
+    the same JD and model. Entries are keyed by content (e.g. the parsed
+    text hash), never by file name, which repeats across exports.
+    Thread-safe so batch workers can share it.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self._indexes: Dict[Tuple[str, str, str], LSHIndex] = {}
+        self._results: Dict[Tuple[Tuple[str, str, str], str], Dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {"total": 0, "duplicates": 0, "llm_calls_saved": 0}
+
+    def _index(self, scope: Tuple[str, str, str]) -> LSHIndex:
+        if scope not in self._indexes:
+            self._indexes[scope] = LSHIndex(self.threshold, self.num_perm)
+        return self._indexes[scope]
+
+    def lookup(self, jd_hash: str, resume_text: str, provider: str = "",
+               model: str = "") -> Tuple[Optional[Dict], np.ndarray]:
+        """
+        Returns (adjusted prior analysis or None, signature).
+        Counts towards stats: call once per submitted resume.
+        """
+        scope = (jd_hash, provider, model)
+        sig = self.hasher.signature(resume_text)
+        with self._lock:
+            self.stats["total"] += 1
+            hit = self._index(scope).query(sig)
+            if hit is None:
+                return None, sig
+
+            source, similarity = hit
+            self.stats["duplicates"] += 1
+            self.stats["llm_calls_saved"] += 1
+            prior = self._results[(scope, source)]
+
+        return adjust_analysis(prior, resume_text, source, similarity), sig
+
+    def add(self, jd_hash: str, key: str, resume_text: str, result: Dict, sig: np.ndarray = None,
+            provider: str = "", model: str = ""):
+        """
+        key must identify the content (text hash), not the file name.
+        """
+        scope = (jd_hash, provider, model)
+        if sig is None:
+            sig = self.hasher.signature(resume_text)
+        with self._lock:
+            self._index(scope).add(key, sig)
+            self._results[(scope, key)] = result
+
+    def report(self) -> Dict:
+        total = self.stats["total"]
+        return {
+            **self.stats,
+            "dedup_ratio": round(self.stats["duplicates"] / total, 4) if total else 0.0,
+        }
+
+
+# ======================================================
+# Batch helper
+# ======================================================
+def analyze_batch_dedup(records: Iterable[Tuple[str, str]], jd_text: str, provider: str, model: str,
+                        groq_api_key: str = "", gemini_api_key: str = "",
+                        dedup: Deduplicator = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    records: (name, resume_text) pairs (e.g. parse_resume output).
+    Yields (name, analysis); near-duplicates skip the LLM call.
+    Read dedup.report() afterwards for dedup ratio / LLM calls saved.
+    """
+    from modules.analyzer import analyze_resume_vs_jd, compile_jd, is_fallback_result
+    from modules.cache import content_hash
+
+    dedup = dedup or Deduplicator()
+    jd_hash = compile_jd(jd_text)["jd_hash"]
+
+    for name, resume_text in records:
+        reused, sig = dedup.lookup(jd_hash, resume_text, provider, model)
+        if reused is not None:
+            yield name, reused
+            continue
+
+        result = analyze_resume_vs_jd(
+            resume_text=resume_text,
+            jd_text=jd_text,
+            provider=provider,
+            model=model,
+            groq_api_key=groq_api_key,
+            gemini_api_key=gemini_api_key,
+        )
+        # Errors and invalid-JSON fallbacks must not be reused for duplicates
+        if "error" not in result and not is_fallback_result(result):
+            dedup.add(jd_hash, content_hash(resume_text), resume_text, result, sig, provider, model)
+        yield name, result
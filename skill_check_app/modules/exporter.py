@@ -1,3 +1,5 @@
+import io
+
 # import pdfkit
 # import os
 
@@ -10,15 +12,15 @@
 #         return f"PDF Export Error: {str(e)}"
 
 
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from bs4 import BeautifulSoup
-
 def export_html_to_pdf(html_str: str, output_path: str) -> str:
     """
     Convert simplified HTML text into PDF using ReportLab.
     Streamlit Cloud safe (no wkhtmltopdf).
     """
+    # Imported on first export to keep app startup light
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from bs4 import BeautifulSoup
 
     c = canvas.Canvas(output_path, pagesize=letter)
     width, height = letter
@@ -38,3 +40,12 @@ def export_html_to_pdf(html_str: str, output_path: str) -> str:
 
     c.save()
     return output_path
+
+
+def export_html_to_pdf_bytes(html_str: str) -> bytes:
+    """
+    Same as export_html_to_pdf but returns the PDF bytes (API / worker pools).
+    """
+    buf = io.BytesIO()
+    export_html_to_pdf(html_str, buf)
+    return buf.getvalue()
@@ -0,0 +1,356 @@
+import io
+import os
+import functools
+import zipfile
+import tarfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Tuple
+
+from modules.cache import content_hash
+
+
+# ======================================================
+# Streaming ingestion of archives and upload bundles
+# ======================================================
+# Sources (uploads, paths, zip / tar / tar.gz archives, nested up to
+# max_depth) are walked entry by entry. Types come from magic bytes, not
+# file names. Entries are parsed concurrently with at most max_in_flight
+# held in memory, and every byte read is counted against limits that stop
+# zip bombs (per-entry size, total size, compression ratio, entry count).
+#
+# Yields (name, text, metadata). Skipped / unparseable entries are
+# yielded too, with empty text and metadata["error"] set.
+DEFAULT_LIMITS = {
+    "max_entries": 5000,
+    "max_entry_bytes": 20 * 1024 * 1024,
+    "max_total_bytes": 512 * 1024 * 1024,
+    "max_ratio": 100,          # uncompressed / compressed, per zip entry
+    "max_depth": 2,           # archives inside archives
+}
+
+DOCUMENT_TYPES = ("pdf", "docx", "txt")
+ARCHIVE_TYPES = ("zip", "tar", "gzip", "bz2", "xz")
+
+_CHUNK = 64 * 1024
+
+
+class LimitExceeded(Exception):
+    def __init__(self, message: str, fatal: bool = False):
+        super().__init__(message)
+        self.fatal = fatal  # bundle-wide budget spent: stop, don't skip
+
+
+# ======================================================
+# Type detection (magic bytes)
+# ======================================================
+def detect_type(data: bytes) -> str:
+    head = data[:512]
+
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04") or head.startswith(b"PK\x05\x06"):
+        # DOCX is a zip with a word/ part
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                if "word/document.xml" in zf.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            return "unknown"
+        return "zip"
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"BZh"):
+        return "bz2"
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if len(head) > 262 and head[257:262] == b"ustar":
+        return "tar"
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        return "ole"  # legacy .doc, not supported
+    if _looks_like_text(head):
+        return "txt"
+    return "unknown"
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if not head or b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+        return True
+    except UnicodeDecodeError as e:
+        # A multi-byte char cut at the 512-byte boundary is still text
+        return e.start >= len(head) - 3
+
+
+# ======================================================
+# Bounded reading
+# ======================================================
+class _Budget:
+    def __init__(self, limits: Dict):
+        self.limits = limits
+        self.entries = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def entry(self):
+        with self._lock:
+            self.entries += 1
+            if self.entries > self.limits["max_entries"]:
+                raise LimitExceeded(f"more than {self.limits['max_entries']} entries", fatal=True)
+
+    def charge(self, n: int):
+        """
+        Count bytes that will be decompressed without being kept, e.g. a
+        skipped member of a streamed tar (reaching the next header means
+        inflating all of it).
+        """
+        with self._lock:
+            self.total += n
+            if self.total > self.limits["max_total_bytes"]:
+                raise LimitExceeded(f"bundle larger than {self.limits['max_total_bytes']} bytes", fatal=True)
+
+    def read(self, stream, declared_compressed: int = None) -> bytes:
+        """
+        Read a stream in chunks, enforcing per-entry, total and ratio limits
+        on the bytes actually produced (headers can lie).
+        """
+        max_entry = self.limits["max_entry_bytes"]
+        max_ratio = self.limits["max_ratio"]
+        buf = bytearray()
+
+        while True:
+            chunk = stream.read(_CHUNK)
+            if not chunk:
+                break
+            buf += chunk
+
+            if len(buf) > max_entry:
+                raise LimitExceeded(f"entry larger than {max_entry} bytes")
+            if declared_compressed and len(buf) > max(declared_compressed, 1) * max_ratio:
+                raise LimitExceeded(f"compression ratio above {max_ratio}")
+
+            with self._lock:
+                self.total += len(chunk)
+                if self.total > self.limits["max_total_bytes"]:
+                    raise LimitExceeded(f"bundle larger than {self.limits['max_total_bytes']} bytes", fatal=True)
+
+        return bytes(buf)
+
+
+def _meta(source: str, path: str, **extra) -> Dict:
+    return {"source": source, "path": path, **extra}
+
+
+# ======================================================
+# Entry iteration
+# ======================================================
+def _iter_zip(data_or_file, source: str, budget: _Budget, depth: int) -> Iterator[Tuple]:
+    with zipfile.ZipFile(data_or_file) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            budget.entry()
+
+            path = f"{source}/{info.filename}"
+            if info.file_size > budget.limits["max_entry_bytes"]:
+                yield path, None, _meta(source, info.filename, error="entry too large")
+                continue
+            if info.compress_size and info.file_size / info.compress_size > budget.limits["max_ratio"]:
+                yield path, None, _meta(source, info.filename, error="suspicious compression ratio")
+                continue
+
+            try:
+                with zf.open(info) as f:
+                    data = budget.read(f, declared_compressed=info.compress_size)
+            except LimitExceeded as e:
+                if e.fatal:
+                    raise
+                yield path, None, _meta(source, info.filename, error=str(e))
+                continue
+
+            yield from _expand(path, data, source, info.filename, budget, depth)
+
+
+def _iter_tar(fileobj, source: str, budget: _Budget, depth: int) -> Iterator[Tuple]:
+    # "r|*" = true streaming: no seeking, transparent gz / bz2 / xz
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+        for member in tf:
+            if not member.isfile():
+                continue  # skips dirs, symlinks, devices
+            budget.entry()
+
+            path = f"{source}/{member.name}"
+            if member.size > budget.limits["max_entry_bytes"]:
+                budget.charge(member.size)  # skipping still inflates it
+                yield path, None, _meta(source, member.name, error="entry too large")
+                continue
+
+            try:
+                data = budget.read(tf.extractfile(member))
+            except LimitExceeded as e:
+                if e.fatal:
+                    raise
+                budget.charge(member.size)  # the unread rest is inflated on skip
+                yield path, None, _meta(source, member.name, error=str(e))
+                continue
+
+            yield from _expand(path, data, source, member.name, budget, depth)
+
+
+def _expand(name: str, data: bytes, source: str, path: str, budget: _Budget, depth: int) -> Iterator[Tuple]:
+    """
+    Documents are yielded; nested archives are walked (up to max_depth).
+    """
+    kind = detect_type(data)
+
+    if kind in ARCHIVE_TYPES:
+        if depth >= budget.limits["max_depth"]:
+            yield name, None, _meta(source, path, type=kind, error="archive nested too deeply")
+            return
+        yield from _iter_source(io.BytesIO(data), name, kind, budget, depth + 1)
+        return
+
+    yield name, data, _meta(source, path, type=kind, size=len(data))
+
+
+def _iter_source(fileobj, name: str, kind: str, budget: _Budget, depth: int) -> Iterator[Tuple]:
+    try:
+        if kind == "zip":
+            yield from _iter_zip(fileobj, name, budget, depth)
+        elif kind in ("tar", "gzip", "bz2", "xz"):
+            yield from _iter_tar(fileobj, name, budget, depth)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        yield name, None, _meta(name, "", type=kind, error=f"corrupt archive: {e}")
+
+
+def iter_entries(sources: Iterable, limits: Dict = None) -> Iterator[Tuple[str, bytes, Dict]]:
+    """
+    (name, raw bytes or None, metadata) for every document in the sources.
+    Sources: paths, or file-like objects with .name (e.g. Streamlit uploads).
+    """
+    budget = _Budget({**DEFAULT_LIMITS, **(limits or {})})
+
+    for src in sources:
+        opened = None
+        if isinstance(src, (str, os.PathLike)):
+            opened = open(src, "rb")
+            fileobj, name = opened, os.path.basename(src)
+        else:
+            fileobj, name = src, os.path.basename(getattr(src, "name", "upload"))
+
+        try:
+            head = fileobj.read(512)
+            fileobj.seek(0)
+            kind = detect_type(head) if not head.startswith(b"PK") else "zip-or-docx"
+
+            if kind == "zip-or-docx":
+                # Needs the central directory: sniff without loading the whole file
+                try:
+                    with zipfile.ZipFile(fileobj) as zf:
+                        is_docx = "word/document.xml" in zf.namelist()
+                except zipfile.BadZipFile:
+                    is_docx = False
+                fileobj.seek(0)
+                kind = "docx" if is_docx else "zip"
+
+            if kind in ARCHIVE_TYPES:
+                yield from _iter_source(fileobj, name, kind, budget, depth=1)
+                continue
+
+            budget.entry()
+            try:
+                data = budget.read(fileobj)
+            except LimitExceeded as e:
+                if e.fatal:
+                    raise
+                yield name, None, _meta(name, "", type=kind, error=str(e))
+                continue
+            yield name, data, _meta(name, "", type=kind, size=len(data))
+
+        except LimitExceeded as e:
+            # Entry-count / total budget exhausted: stop the whole bundle
+            yield name, None, _meta(name, "", error=str(e))
+            return
+        finally:
+            if opened is not None:
+                opened.close()
+
+
+# ======================================================
+# Concurrent parsing
+# ======================================================
+def _parse_entry(name: str, data: bytes, meta: Dict) -> Tuple[str, str, Dict]:
+    from modules.parser import parse_document_bytes
+
+    kind = meta.get("type")
+    if kind not in DOCUMENT_TYPES:
+        return name, "", {**meta, "error": f"unsupported type '{kind}'"}
+
+    # Dispatch on the detected type, whatever the entry was called
+    text = parse_document_bytes(f"entry.{kind}", data)
+    meta = {**meta, "sha256": content_hash(data), "text_hash": content_hash(text)}
+    if not text.strip():
+        meta["error"] = "no text extracted"
+    return name, text, meta
+
+
+def ingest(sources: Iterable, limits: Dict = None, workers: int = 4,
+           max_in_flight: int = 8) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Stream (name, text, metadata) for every document in the sources,
+    in completion order. At most max_in_flight raw entries are held.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        for name, data, meta in iter_entries(sources, limits):
+            if data is None:
+                yield name, "", meta
+                continue
+
+            pending.add(pool.submit(_parse_entry, name, data, meta))
+            del data
+
+            while len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    yield f.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield f.result()
+
+
+def analyze_ingested(sources: Iterable, jd_text: str, provider: str, model: str,
+                     groq_api_key: str = "", gemini_api_key: str = "",
+                     limits: Dict = None, llm_concurrency: int = 8) -> Iterator[Tuple[str, Dict, Dict]]:
+    """
+    Feed ingested documents straight into the analyzer through the
+    streaming pipeline. Yields (name, analysis or {"error"}, metadata).
+    """
+    from modules.pipeline import Pipeline, Stage, analyze_item
+
+    # Already parsed here, so the pipeline is just the analyze stage
+    pipe = Pipeline([
+        Stage("analyze", functools.partial(analyze_item, jd_text=jd_text, provider=provider, model=model,
+                                           groq_api_key=groq_api_key, gemini_api_key=gemini_api_key),
+              "thread", llm_concurrency),
+    ])
+
+    skipped = []
+
+    def items():
+        for name, text, meta in ingest(sources, limits):
+            if meta.get("error"):
+                skipped.append((name, {"error": meta["error"]}, meta))
+                continue
+            yield {"name": name, "resume_text": text, "metadata": meta}
+
+    for item in pipe.run(items()):
+        analysis = item.get("analysis") or {"error": item.get("error", "")}
+        yield item["name"], analysis, item["metadata"]
+
+    yield from skipped
@@ -0,0 +1,585 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from modules.cache import content_hash
+
+
+# ======================================================
+# Durable job queue (SQLite, WAL mode)
+# ======================================================
+# Stages run parse → analyze → rewrite. Every job has an idempotent key:
+# parse per document, analyze per (document, JD, provider, model), rewrite
+# per (..., template). Re-enqueuing a batch after a crash, or with another
+# model / --rewrite, only adds what is missing and completed work (parsing
+# included) is never redone. A job waits for the job named in its `after`
+# column to be done; if that one is dead-lettered, so are its dependents,
+# including ones enqueued after it died.
+#
+# Workers lease jobs with a visibility timeout: a job whose worker died
+# becomes visible again once the lease expires. Failures are retried with
+# exponential backoff and dead-lettered after max_attempts.
+STAGES = ("parse", "analyze", "rewrite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY,
+    job_key      TEXT UNIQUE NOT NULL,
+    stage        TEXT NOT NULL,
+    batch        TEXT,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | dead
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,                    -- retry time / lease expiry
+    lease_owner  TEXT,
+    after        TEXT,                             -- job_key that must be done first
+    result       TEXT,
+    last_error   TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, stage, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch, stage, status);
+
+-- Large texts (parsed resumes, JDs) stored once by content hash
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+"""
+
+
+class JobError(Exception):
+    """
+    Raised by a handler for a retriable failure (e.g. provider outage).
+    """
+
+
+class JobQueue:
+    """
+    One SQLite file shared by any number of worker threads / processes.
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, backoff_s: float = 5.0,
+                 max_backoff_s: float = 600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+        # Queues created before job dependencies existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "after" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN after TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_after ON jobs(after)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        # IMMEDIATE takes the write lock up front, so two workers can't
+        # lease the same row between SELECT and UPDATE
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --------------------------------------------------
+    # Blobs
+    # --------------------------------------------------
+    def put_text(self, text: str, conn: sqlite3.Connection = None) -> str:
+        h = content_hash(text)
+        (conn or self._conn()).execute(
+            "INSERT OR IGNORE INTO blobs(hash, text) VALUES (?, ?)", (h, text)
+        )
+        return h
+
+    def get_text(self, h: str) -> Optional[str]:
+        row = self._conn().execute("SELECT text FROM blobs WHERE hash = ?", (h,)).fetchone()
+        return row["text"] if row else None
+
+    # --------------------------------------------------
+    # Enqueue / lease / complete / fail
+    # --------------------------------------------------
+    def _insert(self, conn, job_key: str, stage: str, payload: Dict, batch: str = None,
+                after: str = None) -> bool:
+        now = time.time()
+        status, error = "queued", None
+        if after is not None:
+            dep = conn.execute("SELECT status FROM jobs WHERE job_key = ?", (after,)).fetchone()
+            if dep is not None and dep["status"] == "dead":
+                # Added behind a job that already died: it could never run
+                status, error = "dead", f"depends on dead job {after}"
+
+        cur = conn.execute(
+            """INSERT OR IGNORE INTO jobs
+               (job_key, stage, batch, payload, status, after, last_error, max_attempts,
+                available_at, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (job_key, stage, batch, json.dumps(payload), status, after, error, self.max_attempts,
+             now, now, now),
+        )
+        return cur.rowcount == 1
+
+    def enqueue(self, job_key: str, stage: str, payload: Dict, batch: str = None,
+                after: str = None) -> bool:
+        """
+        Returns False if a job with this key already exists (any status).
+        The job is not leased before the job keyed `after` is done.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}'. Use: {', '.join(STAGES)}")
+        with self._tx() as conn:
+            return self._insert(conn, job_key, stage, payload, batch, after)
+
+    def result_of(self, job_key: str) -> Optional[Dict]:
+        """
+        Result of a finished job, or None if it isn't done.
+        """
+        row = self._conn().execute(
+            "SELECT result FROM jobs WHERE job_key = ? AND status = 'done'", (job_key,)
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def lease(self, owner: str, stages: Iterable[str] = STAGES, limit: int = 1,
+              visibility_timeout: float = 300.0) -> List[Dict]:
+        stages = list(stages)
+        marks = ",".join("?" * len(stages))
+        now = time.time()
+
+        with self._tx() as conn:
+            # Leases that expired after too many attempts go to the dead letter
+            expired = conn.execute(
+                f"""SELECT job_key FROM jobs
+                    WHERE status = 'leased' AND available_at <= ?
+                      AND attempts >= max_attempts AND stage IN ({marks})""",
+                (now, *stages),
+            ).fetchall()
+            for row in expired:
+                conn.execute(
+                    """UPDATE jobs SET status = 'dead', lease_owner = NULL, updated_at = ?,
+                           last_error = COALESCE(last_error, 'lease expired')
+                       WHERE job_key = ?""",
+                    (now, row["job_key"]),
+                )
+                self._dead_dependents(conn, row["job_key"], now)
+            rows = conn.execute(
+                f"""SELECT * FROM jobs
+                    WHERE status IN ('queued', 'leased') AND available_at <= ?
+                      AND stage IN ({marks})
+                      AND (after IS NULL OR EXISTS (
+                           SELECT 1 FROM jobs dep WHERE dep.job_key = jobs.after AND dep.status = 'done'))
+                    ORDER BY available_at, id LIMIT ?""",
+                (now, *stages, limit),
+            ).fetchall()
+
+            for row in rows:
+                conn.execute(
+                    """UPDATE jobs SET status = 'leased', lease_owner = ?, attempts = attempts + 1,
+                           available_at = ?, updated_at = ?
+                       WHERE id = ?""",
+                    (owner, now + visibility_timeout, now, row["id"]),
+                )
+
+        return [
+            {**dict(row), "payload": json.loads(row["payload"]), "attempts": row["attempts"] + 1}
+            for row in rows
+        ]
+
+    def complete(self, job: Dict, owner: str, result: Dict,
+                 follow_ups: List[tuple] = ()) -> bool:
+        """
+        Mark done and enqueue (job_key, stage, payload) follow-ups atomically.
+        Returns False if the lease was lost (another worker owns it now).
+        """
+        with self._tx() as conn:
+            cur = conn.execute(
+                """UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL,
+                       last_error = NULL, updated_at = ?
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (json.dumps(result), time.time(), job["id"], owner),
+            )
+            if cur.rowcount != 1:
+                return False
+
+            for job_key, stage, payload in follow_ups:
+                self._insert(conn, job_key, stage, payload, job.get("batch"))
+            return True
+
+    def fail(self, job: Dict, owner: str, error: str, retriable: bool = True) -> str:
+        """
+        Requeue with exponential backoff, or dead-letter. Returns new status.
+        """
+        now = time.time()
+        dead = not retriable or job["attempts"] >= job["max_attempts"]
+        delay = min(self.max_backoff_s, self.backoff_s * 2 ** (job["attempts"] - 1))
+        status = "dead" if dead else "queued"
+
+        with self._tx() as conn:
+            cur = conn.execute(
+                """UPDATE jobs SET status = ?, lease_owner = NULL, last_error = ?,
+                       available_at = ?, updated_at = ?
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (status, error[:2000], now if dead else now + delay, now, job["id"], owner),
+            )
+            if dead and cur.rowcount == 1:
+                self._dead_dependents(conn, job["job_key"], now)
+        return status
+
+    def _dead_dependents(self, conn, job_key: str, now: float):
+        # Jobs waiting on a dead job can never run: dead-letter them too
+        # (requeue_dead revives the whole chain)
+        keys = [job_key]
+        while keys:
+            key = keys.pop()
+            rows = conn.execute(
+                "SELECT job_key FROM jobs WHERE after = ? AND status = 'queued'", (key,)
+            ).fetchall()
+            conn.execute(
+                """UPDATE jobs SET status = 'dead', last_error = ?, updated_at = ?
+                   WHERE after = ? AND status = 'queued'""",
+                (f"depends on dead job {key}", now, key),
+            )
+            keys.extend(r["job_key"] for r in rows)
+
+    # --------------------------------------------------
+    # Maintenance / inspection
+    # --------------------------------------------------
+    def reclaim_leases(self) -> int:
+        """
+        Release every lease immediately (only safe when no worker is running).
+        """
+        with self._tx() as conn:
+            return conn.execute(
+                """UPDATE jobs SET status = 'queued', lease_owner = NULL, available_at = ?
+                   WHERE status = 'leased'""",
+                (time.time(),),
+            ).rowcount
+
+    def requeue_dead(self, stage: str = None) -> int:
+        """
+        Revive dead jobs. Jobs whose dependency stays dead (e.g. only
+        --stage analyze revived behind a dead parse) are dead-lettered
+        again, so the returned count is what can actually run.
+        """
+        now = time.time()
+        with self._tx() as conn:
+            sql = """UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?
+                     WHERE status = 'dead'"""
+            args = [now]
+            if stage:
+                sql += " AND stage = ?"
+                args.append(stage)
+            revived = conn.execute(sql, args).rowcount
+
+            blocked_on = conn.execute(
+                """SELECT DISTINCT dep.job_key FROM jobs
+                   JOIN jobs dep ON dep.job_key = jobs.after
+                   WHERE jobs.status = 'queued' AND dep.status = 'dead'"""
+            ).fetchall()
+            before = conn.total_changes
+            for row in blocked_on:
+                self._dead_dependents(conn, row["job_key"], now)
+            return revived - (conn.total_changes - before)
+
+    def counts(self, batch: str = None) -> Dict[str, Dict[str, int]]:
+        sql = "SELECT stage, status, COUNT(*) AS n FROM jobs"
+        args = []
+        if batch:
+            sql += " WHERE batch = ?"
+            args.append(batch)
+        sql += " GROUP BY stage, status"
+
+        out: Dict[str, Dict[str, int]] = {}
+        for row in self._conn().execute(sql, args):
+            out.setdefault(row["stage"], {})[row["status"]] = row["n"]
+        return out
+
+    def results(self, stage: str = "analyze", batch: str = None) -> List[Dict]:
+        sql = "SELECT job_key, payload, result FROM jobs WHERE stage = ? AND status = 'done'"
+        args = [stage]
+        if batch:
+            sql += " AND batch = ?"
+            args.append(batch)
+        return [
+            {"job_key": r["job_key"], "payload": json.loads(r["payload"]), "result": json.loads(r["result"])}
+            for r in self._conn().execute(sql + " ORDER BY id", args)
+        ]
+
+    def pending(self) -> int:
+        """
+        Jobs that can still run: queued or leased, and not waiting (directly
+        or through a chain) on a dead job.
+        """
+        return self._conn().execute(
+            """WITH RECURSIVE blocked(job_key) AS (
+                   SELECT jobs.job_key FROM jobs
+                   JOIN jobs dep ON dep.job_key = jobs.after
+                   WHERE jobs.status = 'queued' AND dep.status = 'dead'
+                   UNION
+                   SELECT jobs.job_key FROM jobs
+                   JOIN blocked ON jobs.after = blocked.job_key
+                   WHERE jobs.status = 'queued'
+               )
+               SELECT COUNT(*) FROM jobs
+               WHERE status IN ('queued', 'leased')
+                 AND job_key NOT IN (SELECT job_key FROM blocked)"""
+        ).fetchone()[0]
+
+
+# ======================================================
+# Job keys
+# ======================================================
+def parse_key(doc_hash: str) -> str:
+    return f"parse:{doc_hash}"
+
+
+def analyze_key(doc_hash: str, jd_hash: str, provider: str, model: str) -> str:
+    return f"analyze:{doc_hash}:{jd_hash}:{provider}:{model}"
+
+
+def rewrite_key(doc_hash: str, jd_hash: str, provider: str, model: str, template: str) -> str:
+    return f"rewrite:{doc_hash}:{jd_hash}:{provider}:{model}:{template}"
+
+
+def parsed_text_hash(queue: JobQueue, doc_hash: str) -> Optional[str]:
+    """
+    Blob hash of a document's parsed text, once its parse job is done.
+    """
+    result = queue.result_of(parse_key(doc_hash))
+    return result["text_hash"] if result else None
+
+
+# ======================================================
+# Batch screening
+# ======================================================
+def enqueue_batch(queue: JobQueue, resume_paths: Iterable[str], jd_text: str,
+                  provider: str, model: str, rewrite: bool = False,
+                  template: str = "professional", batch: str = None) -> Dict[str, int]:
+    """
+    Enqueue parse (per document), analyze and optional rewrite jobs for
+    every resume against one JD. Safe to call again: existing jobs (and
+    their results) are kept, and only the stages missing for this
+    provider / model / template are added. API keys are never persisted;
+    workers read them from their own config.
+    """
+    jd_hash = queue.put_text(jd_text)
+    added = skipped = 0
+
+    for path in resume_paths:
+        with open(path, "rb") as f:
+            doc_hash = content_hash(f.read())
+
+        doc = {"path": os.path.abspath(path), "doc_hash": doc_hash}
+        a_key = analyze_key(doc_hash, jd_hash, provider, model)
+        a_payload = {**doc, "jd_hash": jd_hash, "provider": provider, "model": model}
+
+        new = queue.enqueue(parse_key(doc_hash), "parse", doc, batch)
+        new |= queue.enqueue(a_key, "analyze", a_payload, batch, after=parse_key(doc_hash))
+        if rewrite:
+            r_key = rewrite_key(doc_hash, jd_hash, provider, model, template)
+            new |= queue.enqueue(r_key, "rewrite", {**a_payload, "template": template}, batch, after=a_key)
+
+        if new:
+            added += 1
+        else:
+            skipped += 1
+
+    return {"added": added, "skipped": skipped}
+
+
+def backfill_columnar(queue: JobQueue, columnar) -> int:
+    """
+    Write finished analyses missing from a ColumnarWriter's directory,
+    e.g. rows still buffered when a worker crashed (their jobs are done,
+    so no rerun writes them). Run it while no other worker writes there,
+    or their buffered rows are written twice. Returns rows added.
+    """
+    from modules.columnar import row_keys
+
+    have = row_keys(columnar.path)
+    added = 0
+    for done in queue.results("analyze"):
+        p = done["payload"]
+        text_hash = parsed_text_hash(queue, p["doc_hash"])
+        key = (p["jd_hash"], text_hash, p["provider"], p["model"])
+        if key in have:
+            continue
+        columnar.save(
+            done["result"],
+            jd_hash=p["jd_hash"],
+            resume_hash=text_hash,
+            candidate=os.path.basename(p["path"]),
+            provider=p["provider"],
+            model=p["model"],
+        )
+        have.add(key)
+        added += 1
+
+    columnar.flush()
+    return added
+
+
+def default_handlers(queue: JobQueue, groq_api_key: str = "", gemini_api_key: str = "",
+                     store=None, dedup=None, columnar=None) -> Dict[str, Callable]:
+    """
+    Stage handlers: payload → (result, follow_ups). Raise JobError to retry.
+    Analyses are also written to `store` (a ResultStore) and `columnar`
+    (a ColumnarWriter) when given, and near-duplicate resumes reuse a
+    prior analysis when `dedup` (a Deduplicator) is given.
+    """
+    from modules.parser import parse_document_bytes
+    from modules.analyzer import analyze_resume_vs_jd, is_fallback_result
+    from modules.rewriter import rewrite_full_resume_html
+
+    def parse(p):
+        with open(p["path"], "rb") as f:
+            text = parse_document_bytes(os.path.basename(p["path"]), f.read())
+        if not text.strip():
+            raise ValueError(f"Could not parse {p['path']}")  # not retriable
+
+        return {"text_hash": queue.put_text(text), "chars": len(text)}, []
+
+    def analyze(p):
+        text_hash = parsed_text_hash(queue, p["doc_hash"])
+        resume_text = queue.get_text(text_hash)
+        name = os.path.basename(p["path"])
+
+        reused, sig = (None, None)
+        if dedup is not None:
+            reused, sig = dedup.lookup(p["jd_hash"], resume_text, p["provider"], p["model"])
+
+        if reused is not None:
+            result = reused
+        else:
+            result = analyze_resume_vs_jd(
+                resume_text=resume_text,
+                jd_text=queue.get_text(p["jd_hash"]),
+                provider=p["provider"],
+                model=p["model"],
+                groq_api_key=groq_api_key,
+                gemini_api_key=gemini_api_key,
+            )
+            if "error" in result:
+                raise JobError(result["error"])
+            if is_fallback_result(result):
+                raise JobError(result["summary_feedback"])  # unparseable output: try again
+            if dedup is not None:
+                dedup.add(p["jd_hash"], text_hash, resume_text, result, sig, p["provider"], p["model"])
+
+        for sink in (store, columnar):
+            if sink is not None:
+                sink.save(
+                    result,
+                    jd_hash=p["jd_hash"],
+                    resume_hash=text_hash,
+                    candidate=name,
+                    provider=p["provider"],
+                    model=p["model"],
+                )
+        return result, []
+
+    def rewrite(p):
+        analysis = queue.result_of(analyze_key(p["doc_hash"], p["jd_hash"], p["provider"], p["model"]))
+        html = rewrite_full_resume_html(
+            resume_text=queue.get_text(parsed_text_hash(queue, p["doc_hash"])),
+            jd_text=queue.get_text(p["jd_hash"]),
+            matched_skills=analysis.get("matched_skills", []),
+            missing_skills=analysis.get("missing_skills", []),
+            similarity_score=analysis.get("fit_score", 0),
+            provider=p["provider"],
+            model=p["model"],
+            template=p["template"],
+            groq_api_key=groq_api_key,
+            gemini_api_key=gemini_api_key,
+        )
+        if html.lstrip().startswith("<!-- Resume Rewrite Error"):
+            raise JobError(html)
+        return {"html_hash": queue.put_text(html)}, []
+
+    return {"parse": parse, "analyze": analyze, "rewrite": rewrite}
+
+
+def run_worker(queue: JobQueue, handlers: Dict[str, Callable], stages: Iterable[str] = STAGES,
+               visibility_timeout: float = 300.0, poll_s: float = 1.0,
+               stop: threading.Event = None, exit_when_idle: bool = True) -> Dict[str, int]:
+    """
+    Lease → run handler → complete / fail, until idle (or stop is set).
+    """
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    stats = {"done": 0, "retried": 0, "dead": 0, "lost": 0}
+    stop = stop or threading.Event()
+
+    while not stop.is_set():
+        jobs = queue.lease(owner, stages, limit=1, visibility_timeout=visibility_timeout)
+
+        if not jobs:
+            if exit_when_idle and queue.pending() == 0:
+                break
+            stop.wait(poll_s)  # other jobs leased or backing off
+            continue
+
+        job = jobs[0]
+        try:
+            result, follow_ups = handlers[job["stage"]](job["payload"])
+        except JobError as e:
+            status = queue.fail(job, owner, str(e), retriable=True)
+            stats["dead" if status == "dead" else "retried"] += 1
+            continue
+        except Exception as e:
+            queue.fail(job, owner, f"{type(e).__name__}: {e}", retriable=False)
+            stats["dead"] += 1
+            continue
+
+        if queue.complete(job, owner, result, follow_ups):
+            stats["done"] += 1
+        else:
+            stats["lost"] += 1
+
+    return stats
+
+
+def run_workers(queue: JobQueue, handlers: Dict[str, Callable], n: int = 4, **kwargs) -> Dict[str, int]:
+    """
+    n worker threads (LLM stages are network-bound) sharing one queue file.
+    """
+    totals = {"done": 0, "retried": 0, "dead": 0, "lost": 0}
+    lock = threading.Lock()
+
+    def target():
+        stats = run_worker(queue, handlers, **kwargs)
+        with lock:
+            for k, v in stats.items():
+                totals[k] += v
+
+    threads = [threading.Thread(target=target, daemon=True) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return totals
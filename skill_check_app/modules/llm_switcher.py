@@ -1,4 +1,13 @@
 import os
+import re
+import sys
+import json
+import time
+import logging
+import hashlib
+import importlib
+import threading
+from typing import Callable
 from dotenv import load_dotenv
 
 # Load .env
@@ -6,10 +15,259 @@ load_dotenv()
 ENV_GROQ_KEY = os.getenv("GROQ_API_KEY", "")
 ENV_GEMINI_KEY = os.getenv("GEMINI_API_KEY", "")
 
-# External Clients
-import ollama
-from groq import Groq
-import google.generativeai as genai
+logger = logging.getLogger(__name__)
+
+# Provider SDKs (ollama, groq, google.ai.generativelanguage) are imported on first
+# use inside each caller, so startup only pays for the provider in use.
+
+# Record / replay backend
+from modules import replay
+from modules.cache import CLIENT_CACHE, content_hash
+
+_PROVIDER_SDKS = {
+    "ollama": "ollama",
+    "groq": "groq",
+    "gemini": "google.ai.generativelanguage",
+}
+
+
+# ======================================================
+# WARM START
+# ======================================================
+def warm_start(provider: str):
+    """
+    Import the provider SDK on a background thread so the first
+    call_model() doesn't pay for it. Returns the thread (or None).
+    """
+    name = _PROVIDER_SDKS.get(provider.lower())
+    if name is None or name in sys.modules:
+        return None
+
+    thread = threading.Thread(target=importlib.import_module, args=(name,), daemon=True)
+    thread.start()
+    return thread
+
+
+# ======================================================
+# OLLAMA LIFECYCLE
+# ======================================================
+# One client per process. The selected model is preloaded at startup and
+# kept resident (keep_alive), so the first analysis doesn't pay the
+# multi-second load. num_ctx is fixed per model: Ollama reloads a model
+# whenever num_ctx changes. The default fits the analyzer prompt
+# (~0.3k tokens of template plus resume and JD) and the rewriter prompt
+# (~0.6k tokens plus the same inputs plus up to ~3k tokens of HTML).
+# Longer prompts step up to the next power of two. OLLAMA_NUM_PARALLEL is
+# the server's slot count; reading the same variable here caps in-flight
+# requests so extra callers wait client-side instead of in Ollama's queue.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+OLLAMA_MAX_CTX = int(os.getenv("OLLAMA_MAX_CTX", "32768"))
+OLLAMA_OUTPUT_RESERVE = int(os.getenv("OLLAMA_OUTPUT_RESERVE", "3072"))
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+OLLAMA_PRELOAD_MAX_BACKOFF_S = 300.0
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _duration_s(value) -> float:
+    """
+    keep_alive ("30m", "1h", 300, "-1") in seconds; negative = forever.
+    """
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    m = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", str(value))
+    if not m:
+        return 0.0
+    seconds = float(m.group(1)) * _DURATION_UNITS[m.group(2) or "s"]
+    return float("inf") if seconds < 0 else seconds
+
+
+class OllamaManager:
+    def __init__(self, host: str = None, keep_alive=OLLAMA_KEEP_ALIVE, num_ctx: int = OLLAMA_NUM_CTX,
+                 num_parallel: int = OLLAMA_NUM_PARALLEL, models_ttl: float = 60.0):
+        self.host = host or os.getenv("OLLAMA_HOST") or None
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.models_ttl = models_ttl
+
+        self._client = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, num_parallel))
+        self._loaded = {}       # model → (num_ctx, expires_at monotonic)
+        self._preloading = {}   # model → thread
+        self._preload_backoff = {}  # model → (failures, retry_at monotonic)
+        self._models = None     # (fetched_at, names or None, error or None)
+        self.stats = {"calls": 0, "cold_calls": 0, "preloads": 0, "list_requests": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import ollama
+                    self._client = ollama.Client(host=self.host)
+        return self._client
+
+    # --------------------------------------------------
+    # Context sizing
+    # --------------------------------------------------
+    def ctx_for(self, prompt: str, model: str = None) -> int:
+        """
+        The model's current num_ctx if the prompt fits (changing it reloads
+        the model), else the default doubled until it does.
+        """
+        needed = estimate_tokens(prompt) + OLLAMA_OUTPUT_RESERVE
+        resident = self.loaded_ctx(model) if model else None
+        if resident is not None and resident >= needed:
+            return resident
+
+        ctx = self.num_ctx
+        while ctx < needed and ctx < OLLAMA_MAX_CTX:
+            ctx *= 2
+        return min(ctx, OLLAMA_MAX_CTX)
+
+    # --------------------------------------------------
+    # Loaded-model tracking
+    # --------------------------------------------------
+    def _mark_loaded(self, model: str, num_ctx: int):
+        with self._lock:
+            self._loaded[model] = (num_ctx, time.monotonic() + _duration_s(self.keep_alive))
+
+    def loaded_ctx(self, model: str):
+        """
+        num_ctx the model is resident with, or None if it isn't loaded.
+        """
+        entry = self._loaded.get(model)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def is_loaded(self, model: str, num_ctx: int = None) -> bool:
+        resident = self.loaded_ctx(model)
+        if resident is None:
+            return False
+        return num_ctx is None or resident == num_ctx
+
+    def refresh_loaded(self) -> list:
+        """
+        Sync with the server's view (`ollama ps`): models unloaded behind
+        our back (restart, memory pressure) are forgotten.
+        """
+        running = self.client.ps().models
+        now_wall, now = time.time(), time.monotonic()
+        with self._lock:
+            self._loaded = {
+                m.model: (
+                    getattr(m, "context_length", None) or self.num_ctx,
+                    now + (m.expires_at.timestamp() - now_wall if m.expires_at else _duration_s(self.keep_alive)),
+                )
+                for m in running
+            }
+            return sorted(self._loaded)
+
+    # --------------------------------------------------
+    # Preload / list / chat
+    # --------------------------------------------------
+    def preload(self, model: str, wait: bool = False):
+        """
+        Load `model` with the default num_ctx on a background thread (an
+        empty generate loads without generating). No-op if it's already
+        resident with at least that num_ctx, or loading. Returns the
+        thread, or None.
+        """
+        resident = self.loaded_ctx(model) if model else None
+        if not model or (resident is not None and resident >= self.num_ctx):
+            return None
+
+        with self._lock:
+            failed = self._preload_backoff.get(model)
+            if failed and time.monotonic() < failed[1]:
+                return None  # server down / model missing: don't retry every rerun
+            thread = self._preloading.get(model)
+            if thread is None:
+                thread = threading.Thread(target=self._preload, args=(model,), daemon=True)
+                self._preloading[model] = thread
+                thread.start()
+
+        if wait:
+            thread.join()
+        return thread
+
+    def _preload(self, model: str):
+        try:
+            self.client.generate(model=model, prompt="", keep_alive=self.keep_alive,
+                                 options={"num_ctx": self.num_ctx})
+            self._mark_loaded(model, self.num_ctx)
+            self.stats["preloads"] += 1
+            with self._lock:
+                self._preload_backoff.pop(model, None)
+        except Exception as e:
+            with self._lock:
+                failures = self._preload_backoff.get(model, (0, 0))[0] + 1
+                delay = min(OLLAMA_PRELOAD_MAX_BACKOFF_S, 5.0 * 2 ** (failures - 1))
+                self._preload_backoff[model] = (failures, time.monotonic() + delay)
+            logger.warning("ollama preload of %s failed (retry in %.0fs): %s", model, delay, e)
+        finally:
+            with self._lock:
+                self._preloading.pop(model, None)
+
+    def list_models(self, refresh: bool = False) -> list:
+        """
+        Installed model names, cached for models_ttl seconds. Failures are
+        cached too (the same error is re-raised), so a down server isn't
+        queried on every rerun.
+        """
+        cached = self._models
+        if not refresh and cached and time.monotonic() - cached[0] < self.models_ttl:
+            if cached[2] is not None:
+                raise cached[2]
+            return cached[1]
+
+        self.stats["list_requests"] += 1
+        try:
+            names = sorted(m.model for m in self.client.list().models)
+        except Exception as e:
+            self._models = (time.monotonic(), None, e)
+            raise
+        self._models = (time.monotonic(), names, None)
+        return names
+
+    def chat(self, model: str, prompt: str) -> str:
+        num_ctx = self.ctx_for(prompt, model)
+
+        # A preload still in flight: wait for it rather than racing a second load
+        loading = self._preloading.get(model)
+        if loading is not None and num_ctx == self.num_ctx:
+            loading.join()
+
+        if not self.is_loaded(model, num_ctx):
+            self.stats["cold_calls"] += 1
+        self.stats["calls"] += 1
+
+        with self._slots:
+            response = self.client.chat(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                keep_alive=self.keep_alive,
+                options={"num_ctx": num_ctx},
+            )
+        self._mark_loaded(model, num_ctx)
+        return response["message"]["content"]
+
+
+_ollama_manager = None
+_ollama_manager_lock = threading.Lock()
+
+
+def get_ollama_manager() -> OllamaManager:
+    global _ollama_manager
+    if _ollama_manager is None:
+        with _ollama_manager_lock:
+            if _ollama_manager is None:
+                _ollama_manager = OllamaManager()
+    return _ollama_manager
+
 
 
 # ======================================================
@@ -17,17 +275,40 @@ import google.generativeai as genai
 # ======================================================
 def call_ollama(model: str, prompt: str) -> str:
     try:
-        response = ollama.chat(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response["message"]["content"]
+        return get_ollama_manager().chat(model, prompt)
 
     except Exception as e:
         return f"[Ollama Error: {str(e)}]"
 
 
 
+# ======================================================
+# SHARED PROVIDER CLIENTS
+# ======================================================
+def get_groq_client(api_key: str):
+    """
+    One Groq client (and connection pool) per API key, shared across sessions.
+    """
+    def build():
+        from groq import Groq
+        return Groq(api_key=api_key)
+
+    return CLIENT_CACHE.get_or_compute(("groq", content_hash(api_key)), build)
+
+
+def get_gemini_client(api_key: str):
+    """
+    Per-key Gemini service client. genai.configure() is process-global, so
+    calling it per request would let concurrent sessions swap keys.
+    """
+    def build():
+        from google.ai import generativelanguage as glm
+        return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+    return CLIENT_CACHE.get_or_compute(("gemini", content_hash(api_key)), build)
+
+
+
 # ======================================================
 # GROQ CALLER
 # ======================================================
@@ -36,7 +317,7 @@ def call_groq(model: str, prompt: str, api_key: str) -> str:
         return "[Groq Error: Missing API key]"
 
     try:
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
 
         resp = client.chat.completions.create(
             model=model,
@@ -59,17 +340,26 @@ def call_gemini(model: str, prompt: str, api_key: str) -> str:
         return "[Gemini Error: Missing API key]"
 
     try:
+        from google.ai import generativelanguage as glm
+
         # Gemini requires "models/<name>"
         if not model.startswith("models/"):
             model = f"models/{model}"
 
-        genai.configure(api_key=api_key)
+        # Built explicitly for the per-key service client, so no SDK
+        # global (genai.configure) or private attribute is involved
+        request = glm.GenerateContentRequest(
+            model=model,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+        )
+        response = get_gemini_client(api_key).generate_content(request=request)
 
-        gmodel = genai.GenerativeModel(model)
-        response = gmodel.generate_content(prompt)
+        if not response.candidates:
+            reason = response.prompt_feedback.block_reason
+            return f"[Gemini Error: No candidates returned (block reason: {reason.name})]"
 
-        # Gemini returns .text, not choices
-        return response.text
+        # Gemini returns candidates → content parts, not choices
+        return "".join(part.text for part in response.candidates[0].content.parts)
 
     except Exception as e:
         return f"[Gemini Error: {str(e)}]"
@@ -77,18 +367,57 @@ def call_gemini(model: str, prompt: str, api_key: str) -> str:
 
 
 # ======================================================
-# UNIVERSAL CALL WRAPPER
+# FAKE CALLER (local load tests, no network)
 # ======================================================
-def call_model(provider: str, model: str, prompt: str,
-               groq_api_key: str = None, gemini_api_key: str = None) -> str:
+FAKE_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+
+
+def call_fake(model: str, prompt: str) -> str:
     """
-    Normalized universal LLM caller for:
-    - ollama
-    - groq
-    - gemini
+    Deterministic stand-in for a provider: sleeps FAKE_LLM_LATENCY_MS and
+    returns HTML for rewrite prompts, analysis-shaped JSON otherwise.
     """
+    if FAKE_LATENCY_MS > 0:
+        time.sleep(FAKE_LATENCY_MS / 1000)
 
-    provider = provider.lower()
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+
+    if "ResumeWriter" in prompt:
+        return f"<h1>Candidate {seed % 1000}</h1><p>Rewritten by fake model '{model}'.</p>"
+
+    return json.dumps({
+        "ats_score": 40 + seed % 55,
+        "fit_score": 35 + (seed >> 8) % 60,
+        "keyword_coverage": round(((seed >> 16) % 100) / 100, 2),
+        "matched_skills": ["python", "sql"],
+        "missing_skills": ["kubernetes"],
+        "summary_feedback": "Fake summary feedback.",
+        "experience_feedback": "Fake experience feedback.",
+        "missing_keywords": ["terraform"],
+        "final_recommendation": "Fake recommendation.",
+    })
+
+
+
+# ======================================================
+# ERROR DETECTION
+# ======================================================
+_ERROR_RE = re.compile(r"^\[[^\]]*Error\b")
+
+
+def is_error_response(text: str) -> bool:
+    """
+    Callers return "[<Provider> Error: ...]" strings instead of raising.
+    """
+    return bool(_ERROR_RE.match(text or ""))
+
+
+
+# ======================================================
+# PROVIDER DISPATCH
+# ======================================================
+def _dispatch(provider: str, model: str, prompt: str,
+              groq_api_key: str = None, gemini_api_key: str = None) -> str:
 
     # -----------------------------------------------
     # OLLAMA (no API key required)
@@ -113,9 +442,189 @@ def call_model(provider: str, model: str, prompt: str,
         return call_gemini(model, prompt, api_key)
 
 
+    # -----------------------------------------------
+    # FAKE (load tests)
+    # -----------------------------------------------
+    elif provider == "fake":
+        return call_fake(model, prompt)
+
+
     # -----------------------------------------------
     # INVALID PROVIDER
     # -----------------------------------------------
     else:
-        return f"[Error: Unsupported provider '{provider}'. Use: ollama, groq, gemini]"
-# ======================================================
\ No newline at end of file
+        return f"[Error: Unsupported provider '{provider}'. Use: ollama, groq, gemini, replay, fake]"
+
+
+
+# ======================================================
+# UNIVERSAL CALL WRAPPER
+# ======================================================
+def call_model(provider: str, model: str, prompt: str,
+               groq_api_key: str = None, gemini_api_key: str = None) -> str:
+    """
+    Normalized universal LLM caller for:
+    - ollama
+    - groq
+    - gemini
+    - replay (serves a recorded archive, see modules/replay.py)
+    - fake (deterministic local stand-in for load tests)
+
+    LLM_REPLAY_MODE=record captures every successful call to the archive;
+    LLM_REPLAY_MODE=replay serves all providers from it.
+    """
+
+    provider = provider.lower()
+    mode = replay.get_mode()
+
+    def live() -> str:
+        return _dispatch(provider, model, prompt, groq_api_key, gemini_api_key)
+
+    # -----------------------------------------------
+    # REPLAY (explicit provider or global mode)
+    # -----------------------------------------------
+    if provider == "replay":
+        return replay.call_replay(model, prompt)
+
+    if mode == "replay":
+        return replay.call_replay(model, prompt, live=live)
+
+    # -----------------------------------------------
+    # RECORD
+    # -----------------------------------------------
+    if mode == "record":
+        start = time.perf_counter()
+        response = live()
+        if not is_error_response(response):
+            replay.get_archive().record(
+                provider, model, prompt, response, time.perf_counter() - start
+            )
+        return response
+
+    return live()
+
+
+
+# ======================================================
+# ADAPTIVE MODEL ROUTING
+# ======================================================
+# Easy prompts (short, clear-cut) go to a small fast model first; the
+# caller's model is used when the prompt is long / ambiguous, when the
+# small model errors, or when its output fails the caller's validation.
+SMALL_MODELS = {
+    "groq": os.getenv("GROQ_SMALL_MODEL", "llama-3.1-8b-instant"),
+    "gemini": os.getenv("GEMINI_SMALL_MODEL", "gemini-2.0-flash-lite"),
+    "ollama": os.getenv("OLLAMA_SMALL_MODEL", ""),
+    "fake": "fake-small",
+}
+
+# Approx. USD per 1M (input, output) tokens, used for "cost saved" logs
+MODEL_PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+
+ROUTE_MAX_TOKENS = int(os.getenv("ROUTE_MAX_TOKENS", "3000"))
+ROUTE_MAX_DIFFICULTY = float(os.getenv("ROUTE_MAX_DIFFICULTY", "0.5"))
+
+_route_lock = threading.Lock()
+_latency_ewma = {}  # model → smoothed seconds per call
+_route_stats = {
+    "direct": 0,
+    "small": 0,
+    "escalated": 0,
+    "latency_saved_s": 0.0,
+    "cost_saved_usd": 0.0,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose
+    return len(text) // 4 + 1
+
+
+def _cost(model: str, tokens_in: int, tokens_out: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1e6
+
+
+def _observe(model: str, seconds: float):
+    with _route_lock:
+        prev = _latency_ewma.get(model)
+        _latency_ewma[model] = seconds if prev is None else 0.8 * prev + 0.2 * seconds
+
+
+def route_model(provider: str, model: str, prompt: str, difficulty: float = None):
+    """
+    Returns (model_to_try_first, reason).
+    difficulty: 0 = clear-cut, 1 = ambiguous; None = unknown (no routing).
+    """
+    small = SMALL_MODELS.get(provider.lower(), "")
+
+    if not small or small == model:
+        return model, "no smaller model"
+    if difficulty is None:
+        return model, "difficulty unknown"
+    if estimate_tokens(prompt) > ROUTE_MAX_TOKENS:
+        return model, "long prompt"
+    if difficulty > ROUTE_MAX_DIFFICULTY:
+        return model, "hard case"
+    return small, "easy case"
+
+
+def call_model_routed(provider: str, model: str, prompt: str, difficulty: float = None,
+                      validate: Callable[[str], bool] = None,
+                      groq_api_key: str = None, gemini_api_key: str = None) -> str:
+    """
+    call_model() with adaptive routing. `model` is the big model; the small
+    one is tried first for easy prompts and its output is kept only if it
+    isn't an error and passes `validate`.
+    """
+    first, reason = route_model(provider, model, prompt, difficulty)
+    keys = {"groq_api_key": groq_api_key, "gemini_api_key": gemini_api_key}
+
+    def timed(m: str):
+        start = time.perf_counter()
+        raw = call_model(provider, m, prompt, **keys)
+        elapsed = time.perf_counter() - start
+        if not is_error_response(raw):
+            _observe(m, elapsed)
+        return raw, elapsed
+
+    if first == model:
+        with _route_lock:
+            _route_stats["direct"] += 1
+        logger.debug("route %s/%s direct (%s)", provider, model, reason)
+        return timed(model)[0]
+
+    raw, small_s = timed(first)
+
+    if not is_error_response(raw) and (validate is None or validate(raw)):
+        tokens_in, tokens_out = estimate_tokens(prompt), estimate_tokens(raw)
+        cost_saved = _cost(model, tokens_in, tokens_out) - _cost(first, tokens_in, tokens_out)
+        big_s = _latency_ewma.get(model)
+        latency_saved = max(0.0, big_s - small_s) if big_s is not None else 0.0
+
+        with _route_lock:
+            _route_stats["small"] += 1
+            _route_stats["cost_saved_usd"] += cost_saved
+            _route_stats["latency_saved_s"] += latency_saved
+
+        logger.info(
+            "route %s: %s instead of %s (difficulty %.2f), %.2fs, saved ~%.2fs / $%.5f",
+            provider, first, model, difficulty, small_s, latency_saved, cost_saved,
+        )
+        return raw
+
+    with _route_lock:
+        _route_stats["escalated"] += 1
+    logger.info("route %s: %s output rejected after %.2fs, escalating to %s",
+                provider, first, small_s, model)
+    return timed(model)[0]
+
+
+def routing_stats() -> dict:
+    with _route_lock:
+        return {**_route_stats, "latency_ewma_s": dict(_latency_ewma)}
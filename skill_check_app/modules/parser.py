@@ -1,6 +1,9 @@
 import io
-import docx
-import PyPDF2
+import os
+
+from modules.cache import DOCUMENT_CACHE, content_hash
+
+# docx / PyPDF2 are imported inside the extractors that need them
 
 
 # ======================================================
@@ -11,6 +14,8 @@ def extract_text_from_pdf(file) -> str:
     Extract text from PDF using PyPDF2.
     """
     try:
+        import PyPDF2
+
         reader = PyPDF2.PdfReader(file)
         text = ""
         for page in reader.pages:
@@ -29,6 +34,8 @@ def extract_text_from_docx(file) -> str:
     Extract text from DOCX using python-docx.
     """
     try:
+        import docx
+
         doc = docx.Document(file)
         text = "\n".join([p.text for p in doc.paragraphs])
         return text.strip()
@@ -54,15 +61,9 @@ def extract_text_from_txt(file) -> str:
 
 
 # ======================================================
-# Resume parser wrapper
+# Dispatch on extension (+ shared parsed-document cache)
 # ======================================================
-def parse_resume(file) -> str:
-    """
-    Accepts PDF / DOCX / TXT and returns plain text resume.
-    """
-    if file is None:
-        return ""
-
+def _parse_by_extension(file) -> str:
     filename = file.name.lower()
 
     if filename.endswith(".pdf"):
@@ -77,24 +78,49 @@ def parse_resume(file) -> str:
     return ""
 
 
+def _parse_cached(file) -> str:
+    """
+    Streamlit uploads expose getvalue(); identical bytes uploaded by any
+    session are parsed once and served from DOCUMENT_CACHE.
+    """
+    if not hasattr(file, "getvalue"):
+        return _parse_by_extension(file)
+
+    ext = os.path.splitext(file.name.lower())[1]
+    key = content_hash(ext, file.getvalue())
+
+    # Empty text means parsing failed, don't pin that in the cache
+    return DOCUMENT_CACHE.get_or_compute(key, lambda: _parse_by_extension(file), cache_if=bool)
+
+
+def parse_document_bytes(filename: str, data: bytes) -> str:
+    """
+    Parse raw bytes (HTTP uploads, worker pools). Picklable entry point.
+    """
+    file = io.BytesIO(data)
+    file.name = filename
+    return _parse_cached(file)
+
+
 # ======================================================
-# JD parser wrapper
-# (same as resume parser but separated for clarity)
+# Resume parser wrapper
 # ======================================================
-def parse_jd(file) -> str:
+def parse_resume(file) -> str:
+    """
+    Accepts PDF / DOCX / TXT and returns plain text resume.
+    """
     if file is None:
         return ""
 
-    filename = file.name.lower()
+    return _parse_cached(file)
 
-    if filename.endswith(".pdf"):
-        return extract_text_from_pdf(file)
 
-    if filename.endswith(".docx"):
-        return extract_text_from_docx(file)
-
-    if filename.endswith(".txt"):
-        return extract_text_from_txt(file)
+# ======================================================
+# JD parser wrapper
+# (same as resume parser but separated for clarity)
+# ======================================================
+def parse_jd(file) -> str:
+    if file is None:
+        return ""
 
-    return ""
-# ======================================================
\ No newline at end of file
+    return _parse_cached(file)
@@ -0,0 +1,306 @@
+import time
+import queue
+import asyncio
+import threading
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List
+
+
+# ======================================================
+# Overlapped streaming pipeline
+# ======================================================
+# parse → analyze → rewrite → export, with a bounded queue between stages
+# and per-stage concurrency. CPU-bound stages run in a process pool,
+# network-bound LLM stages on threads (the provider SDKs are blocking)
+# or as coroutines, all driven by one asyncio loop so stages overlap
+# across candidates. Results stream out as a generator in completion
+# order; a full queue blocks its producer (backpressure all the way back
+# to the input iterator).
+STAGE_KINDS = ("process", "thread", "async")
+
+_STOP = object()
+
+
+class _Crash:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Dict], Dict], kind: str = "thread",
+                 concurrency: int = 4, queue_size: int = None):
+        """
+        fn takes and returns an item dict. kind="process" needs a picklable
+        (module-level or functools.partial) fn; kind="async" a coroutine fn.
+        """
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unsupported stage kind '{kind}'. Use: {', '.join(STAGE_KINDS)}")
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.concurrency = concurrency
+        self.queue_size = queue_size or concurrency * 2
+        self.stats = {"processed": 0, "errors": 0, "in_flight": 0, "busy_s": 0.0}
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], process_workers: int = None, output_size: int = 16):
+        self.stages = stages
+        self.process_workers = process_workers
+        self.output_size = output_size
+        self._queues: List[asyncio.Queue] = []
+        self._cancelled = threading.Event()
+        self._loop = None
+        self._task = None
+
+    # --------------------------------------------------
+    # Observability
+    # --------------------------------------------------
+    def stats(self) -> List[Dict]:
+        """
+        Snapshot per stage: queued, in_flight, processed, errors, busy_s.
+        Safe to call from any thread while run() is streaming.
+        """
+        out = []
+        for i, stage in enumerate(self.stages):
+            q = self._queues[i] if i < len(self._queues) else None
+            out.append({
+                "stage": stage.name,
+                "kind": stage.kind,
+                "concurrency": stage.concurrency,
+                "queued": q.qsize() if q is not None else 0,
+                **stage.stats,
+            })
+        return out
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+    def run(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Stream finished items. An item that fails a stage gets "error" and
+        "failed_stage" keys and skips the remaining stages.
+        """
+        out = queue.Queue(maxsize=self.output_size)
+        self._cancelled.clear()
+
+        thread = threading.Thread(target=self._thread_main, args=(items, out), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = out.get()
+                if item is _STOP:
+                    break
+                if isinstance(item, _Crash):
+                    raise item.exc
+                yield item
+        finally:
+            # Consumer stopped early (break / close) or we are done
+            self._cancel()
+            thread.join()
+
+    def _cancel(self):
+        self._cancelled.set()
+        if self._loop is not None and self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+
+    # --------------------------------------------------
+    # Event loop side
+    # --------------------------------------------------
+    def _put_out(self, out: queue.Queue, item):
+        # Blocking put that gives up once the consumer has gone away
+        while not self._cancelled.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _thread_main(self, items: Iterable[Dict], out: queue.Queue):
+        try:
+            asyncio.run(self._main(items, out))
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            self._put_out(out, _Crash(e))
+        finally:
+            self._loop = self._task = None
+            self._put_out(out, _STOP)
+
+    async def _main(self, items: Iterable[Dict], out: queue.Queue):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        loop = self._loop
+
+        needs_procs = any(s.kind == "process" for s in self.stages)
+        thread_workers = sum(s.concurrency for s in self.stages if s.kind == "thread")
+
+        procs = ProcessPoolExecutor(self.process_workers) if needs_procs else None
+        threads = ThreadPoolExecutor(max(1, thread_workers))
+        io = ThreadPoolExecutor(2)  # input iterator + output hand-off
+
+        self._queues = [asyncio.Queue(maxsize=s.queue_size) for s in self.stages]
+        last = len(self.stages) - 1
+
+        async def forward(i: int, item: Dict):
+            if i < last:
+                await self._queues[i + 1].put(item)
+            else:
+                await loop.run_in_executor(io, self._put_out, out, item)
+
+        async def feed():
+            it = iter(items)
+            while True:
+                item = await loop.run_in_executor(io, next, it, _STOP)
+                if item is _STOP:
+                    break
+                await self._queues[0].put(item)
+            for _ in range(self.stages[0].concurrency):
+                await self._queues[0].put(_STOP)
+
+        async def worker(i: int, stage: Stage):
+            while True:
+                item = await self._queues[i].get()
+                if item is _STOP:
+                    return
+
+                if "error" not in item:
+                    stage.stats["in_flight"] += 1
+                    start = time.perf_counter()
+                    try:
+                        if stage.kind == "process":
+                            item = await loop.run_in_executor(procs, stage.fn, item)
+                        elif stage.kind == "async":
+                            item = await stage.fn(item)
+                        else:
+                            item = await loop.run_in_executor(threads, stage.fn, item)
+
+                        if "error" in item:
+                            item.setdefault("failed_stage", stage.name)
+                            stage.stats["errors"] += 1
+                        else:
+                            stage.stats["processed"] += 1
+                    except Exception as e:
+                        item = {**item, "error": f"{type(e).__name__}: {e}", "failed_stage": stage.name}
+                        stage.stats["errors"] += 1
+                    finally:
+                        elapsed = time.perf_counter() - start
+                        stage.stats["in_flight"] -= 1
+                        stage.stats["busy_s"] += elapsed
+
+                    item.setdefault("timings", {})[stage.name] = round(elapsed, 4)
+
+                await forward(i, item)
+
+        async def run_stage(i: int, stage: Stage):
+            await asyncio.gather(*(worker(i, stage) for _ in range(stage.concurrency)))
+            if i < last:
+                for _ in range(self.stages[i + 1].concurrency):
+                    await self._queues[i + 1].put(_STOP)
+
+        try:
+            await asyncio.gather(feed(), *(run_stage(i, s) for i, s in enumerate(self.stages)))
+        finally:
+            for pool in (procs, threads, io):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ======================================================
+# Screening stages (module-level so process pools can pickle them)
+# ======================================================
+def parse_item(item: Dict) -> Dict:
+    """
+    {"name", "data": bytes} → {"name", "resume_text"}; pre-parsed items
+    (already carrying "resume_text") pass through.
+    """
+    from modules.parser import parse_document_bytes
+
+    if "resume_text" in item:
+        return item
+
+    out = {k: v for k, v in item.items() if k != "data"}
+    out["resume_text"] = parse_document_bytes(item["name"], item["data"])
+    if not out["resume_text"].strip():
+        raise ValueError(f"Could not parse {item['name']}")
+    return out
+
+
+def analyze_item(item: Dict, jd_text: str, provider: str, model: str,
+                 groq_api_key: str = "", gemini_api_key: str = "") -> Dict:
+    from modules.analyzer import analyze_resume_vs_jd
+
+    result = analyze_resume_vs_jd(
+        resume_text=item["resume_text"],
+        jd_text=jd_text,
+        provider=provider,
+        model=model,
+        groq_api_key=groq_api_key,
+        gemini_api_key=gemini_api_key,
+    )
+    item = {**item, "analysis": result}
+    if "error" in result:
+        item["error"] = result["error"]
+    return item
+
+
+def rewrite_item(item: Dict, jd_text: str, provider: str, model: str, template: str = "professional",
+                 groq_api_key: str = "", gemini_api_key: str = "") -> Dict:
+    from modules.rewriter import rewrite_full_resume_html
+
+    analysis = item["analysis"]
+    html = rewrite_full_resume_html(
+        resume_text=item["resume_text"],
+        jd_text=jd_text,
+        matched_skills=analysis.get("matched_skills", []),
+        missing_skills=analysis.get("missing_skills", []),
+        similarity_score=analysis.get("fit_score", 0),
+        provider=provider,
+        model=model,
+        template=template,
+        groq_api_key=groq_api_key,
+        gemini_api_key=gemini_api_key,
+    )
+    item = {**item, "html": html}
+    if html.startswith("<!-- Resume Rewrite Error"):
+        item["error"] = html
+    return item
+
+
+def export_item(item: Dict) -> Dict:
+    from modules.exporter import export_html_to_pdf_bytes
+
+    return {**item, "pdf": export_html_to_pdf_bytes(item["html"])}
+
+
+def build_screening_pipeline(jd_text: str, provider: str, model: str,
+                             groq_api_key: str = "", gemini_api_key: str = "",
+                             template: str = "professional", rewrite: bool = True, export: bool = True,
+                             parse_concurrency: int = 2, llm_concurrency: int = 8,
+                             export_concurrency: int = 2, queue_size: int = None,
+                             process_workers: int = None) -> Pipeline:
+    """
+    Items in: {"name", "data": bytes} (or {"name", "resume_text"}).
+    Items out: + "analysis", "html", "pdf", "timings" (or "error").
+    """
+    keys = {"groq_api_key": groq_api_key, "gemini_api_key": gemini_api_key}
+
+    stages = [
+        Stage("parse", parse_item, "process", parse_concurrency, queue_size),
+        Stage("analyze", functools.partial(analyze_item, jd_text=jd_text, provider=provider,
+                                           model=model, **keys),
+              "thread", llm_concurrency, queue_size),
+    ]
+    if rewrite:
+        stages.append(Stage("rewrite", functools.partial(rewrite_item, jd_text=jd_text, provider=provider,
+                                                         model=model, template=template, **keys),
+                            "thread", llm_concurrency, queue_size))
+        if export:
+            stages.append(Stage("export", export_item, "process", export_concurrency, queue_size))
+
+    return Pipeline(stages, process_workers=process_workers)
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# ======================================================
+# Replay Settings (env overridable)
+# ======================================================
+# LLM_REPLAY_MODE      off | record | replay
+# LLM_REPLAY_ARCHIVE   path of the archive file
+# LLM_REPLAY_LATENCY   latency scale (1.0 = recorded, 0 = no wait)
+# LLM_REPLAY_FALLBACK  error | cycle | live   (policy for unseen prompts)
+REPLAY_MODES = ("off", "record", "replay")
+FALLBACK_POLICIES = ("error", "cycle", "live")
+
+_settings = {
+    "mode": os.getenv("LLM_REPLAY_MODE", "off").lower(),
+    "path": os.getenv("LLM_REPLAY_ARCHIVE", os.path.join("outputs", "llm_replay.bin")),
+    "latency_scale": float(os.getenv("LLM_REPLAY_LATENCY", "1.0")),
+    "fallback": os.getenv("LLM_REPLAY_FALLBACK", "error").lower(),
+}
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+# ======================================================
+# Archive Format
+# ======================================================
+# Append-only file of records:
+#   header  = key (sha256 of model + prompt), latency (float64),
+#             model length (uint16), payload length (uint32)
+#   model   = utf-8 model name (kept uncompressed for the model index)
+#   payload = zlib(json({provider, model, prompt, response, recorded_at}))
+#
+# Only headers are read on open, so the in-memory index stays small
+# even for a full day of recorded traffic.
+_HEADER = struct.Struct(">32sdHI")
+
+
+def prompt_key(model: str, prompt: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).digest()
+
+
+class ReplayArchive:
+    """
+    Compact, indexed store of recorded prompt → response pairs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[bytes, List[Tuple[int, int, float]]] = {}
+        self._by_model: Dict[str, List[Tuple[int, int, float]]] = {}
+        self._cursor: Dict = {}
+        self._load_index()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._by_key.values())
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+
+        size = os.path.getsize(self.path)
+
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break  # EOF or torn tail from an interrupted write
+
+                key, latency, model_len, payload_len = _HEADER.unpack(header)
+                model = f.read(model_len).decode("utf-8")
+                offset = f.tell()
+
+                if offset + payload_len > size:
+                    break
+
+                f.seek(payload_len, os.SEEK_CUR)
+
+                self._index(key, model, (offset, payload_len, latency))
+
+    def _index(self, key: bytes, model: str, entry: Tuple[int, int, float]):
+        self._by_key.setdefault(key, []).append(entry)
+        self._by_model.setdefault(model, []).append(entry)
+
+    def _read(self, entry: Tuple[int, int, float]) -> Dict:
+        offset, length, _ = entry
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(length)).decode("utf-8"))
+
+    def _next(self, name, entries: List[Tuple[int, int, float]]) -> Tuple[int, int, float]:
+        # Round-robin so repeated prompts replay the recorded variance
+        i = self._cursor.get(name, 0)
+        self._cursor[name] = i + 1
+        return entries[i % len(entries)]
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+    def record(self, provider: str, model: str, prompt: str, response: str, latency: float):
+        payload = zlib.compress(json.dumps({
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "recorded_at": time.time(),
+        }).encode("utf-8"))
+        model_bytes = model.encode("utf-8")
+        key = prompt_key(model, prompt)
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(_HEADER.pack(key, latency, len(model_bytes), len(payload)))
+                f.write(model_bytes)
+                offset = f.tell()
+                f.write(payload)
+            self._index(key, model, (offset, len(payload), latency))
+
+    def lookup(self, model: str, prompt: str) -> Optional[Tuple[str, float]]:
+        key = prompt_key(model, prompt)
+        with self._lock:
+            entries = self._by_key.get(key)
+            if not entries:
+                return None
+            entry = self._next(key, entries)
+            return self._read(entry)["response"], entry[2]
+
+    def any_for_model(self, model: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entries = self._by_model.get(model)
+            if not entries:
+                return None
+            entry = self._next(model, entries)
+            return self._read(entry)["response"], entry[2]
+
+
+# ======================================================
+# Module-level configuration
+# ======================================================
+def configure_replay(mode: str = None, path: str = None,
+                     latency_scale: float = None, fallback: str = None):
+    """
+    Override the env-derived replay settings (e.g. from a load-test script).
+    """
+    global _archive
+
+    if mode is not None:
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unsupported replay mode '{mode}'. Use: {', '.join(REPLAY_MODES)}")
+        _settings["mode"] = mode
+
+    if fallback is not None:
+        if fallback not in FALLBACK_POLICIES:
+            raise ValueError(f"Unsupported fallback '{fallback}'. Use: {', '.join(FALLBACK_POLICIES)}")
+        _settings["fallback"] = fallback
+
+    if latency_scale is not None:
+        _settings["latency_scale"] = float(latency_scale)
+
+    if path is not None and path != _settings["path"]:
+        _settings["path"] = path
+        with _archive_lock:
+            _archive = None
+
+
+def get_mode() -> str:
+    return _settings["mode"]
+
+
+def get_archive() -> ReplayArchive:
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ReplayArchive(_settings["path"])
+        return _archive
+
+
+# ======================================================
+# REPLAY CALLER
+# ======================================================
+def call_replay(model: str, prompt: str, live: Callable[[], str] = None) -> str:
+    """
+    Serve a recorded response at recorded × scale latency.
+    Unseen prompts follow the configured fallback policy.
+    """
+    archive = get_archive()
+    hit = archive.lookup(model, prompt)
+
+    if hit is None:
+        policy = _settings["fallback"]
+
+        if policy == "live" and live is not None:
+            return live()
+
+        if policy == "cycle":
+            hit = archive.any_for_model(model)
+
+        if hit is None:
+            return f"[Replay Error: no recorded response for model '{model}']"
+
+    response, latency = hit
+    delay = latency * _settings["latency_scale"]
+    if delay > 0:
+        time.sleep(delay)
+
+    return response
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from modules.analyzer import is_fallback_result
+
+
+# ======================================================
+# Persistent, indexed store of analysis results (SQLite)
+# ======================================================
+# analyses        one row per (resume, JD, provider, model); scores are
+#                 typed columns indexed per JD for ranking
+# skills          skill vocabulary (lowercased)
+# analysis_skills inverted index: (skill, matched|missing) → analyses,
+#                 clustered on that key so skill filters are index seeks
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id               INTEGER PRIMARY KEY,
+    jd_hash          TEXT NOT NULL,
+    resume_hash      TEXT NOT NULL,
+    candidate        TEXT,
+    provider         TEXT,
+    model            TEXT,
+    ats_score        INTEGER NOT NULL DEFAULT 0,
+    fit_score        INTEGER NOT NULL DEFAULT 0,
+    keyword_coverage REAL NOT NULL DEFAULT 0,
+    created_at       REAL NOT NULL,
+    result           TEXT NOT NULL,
+    UNIQUE (resume_hash, jd_hash, provider, model)
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_jd_fit ON analyses(jd_hash, fit_score DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_jd_ats ON analyses(jd_hash, ats_score DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_fit ON analyses(fit_score DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_ats ON analyses(ats_score DESC);
+
+CREATE TABLE IF NOT EXISTS skills (
+    id   INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analysis_skills (
+    skill_id    INTEGER NOT NULL,
+    kind        INTEGER NOT NULL,       -- 1 = matched, 0 = missing
+    analysis_id INTEGER NOT NULL,
+    PRIMARY KEY (skill_id, kind, analysis_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_analysis_skills_analysis ON analysis_skills(analysis_id);
+"""
+
+MATCHED, MISSING = 1, 0
+ORDER_COLUMNS = ("fit_score", "ats_score", "keyword_coverage", "created_at")
+
+
+# Value normalization shared with modules/columnar.py
+def normalize_skill(skill: str) -> str:
+    return " ".join(str(skill).lower().split())
+
+
+def as_int(value) -> int:
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def as_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ResultStore:
+    """
+    Query and rank past analyses without re-running the LLM.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._skill_ids: Dict[str, int] = {}
+        self._skill_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _skill_id(self, conn: sqlite3.Connection, name: str) -> int:
+        with self._skill_lock:
+            sid = self._skill_ids.get(name)
+            if sid is None:
+                conn.execute("INSERT OR IGNORE INTO skills(name) VALUES (?)", (name,))
+                sid = conn.execute("SELECT id FROM skills WHERE name = ?", (name,)).fetchone()[0]
+                self._skill_ids[name] = sid
+            return sid
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+    def save(self, result: Dict, jd_hash: str, resume_hash: str, candidate: str = "",
+             provider: str = "", model: str = "") -> Optional[int]:
+        return self.save_many([{
+            "result": result, "jd_hash": jd_hash, "resume_hash": resume_hash,
+            "candidate": candidate, "provider": provider, "model": model,
+        }])[0]
+
+    def save_many(self, records: Iterable[Dict]) -> List[Optional[int]]:
+        """
+        Upsert analyses in one transaction. Each record: result, jd_hash,
+        resume_hash and optionally candidate, provider, model. Errors and
+        invalid-JSON fallbacks are not stored (they would overwrite a good
+        analysis of the same pair); their id is None.
+        """
+        conn = self._conn()
+        ids = []
+        now = time.time()
+
+        try:
+            self._save(conn, records, ids, now)
+        except Exception:
+            # Skill ids cached during a rolled-back transaction may not exist
+            with self._skill_lock:
+                self._skill_ids.clear()
+            raise
+
+        return ids
+
+    def _save(self, conn: sqlite3.Connection, records: Iterable[Dict], ids: List[int], now: float):
+        with conn:
+            for rec in records:
+                result = rec["result"]
+                if "error" in result or is_fallback_result(result):
+                    ids.append(None)
+                    continue
+
+                key = (rec["resume_hash"], rec["jd_hash"], rec.get("provider", ""), rec.get("model", ""))
+
+                aid = conn.execute(
+                    """INSERT INTO analyses
+                       (resume_hash, jd_hash, provider, model, candidate, ats_score, fit_score,
+                        keyword_coverage, created_at, result)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (resume_hash, jd_hash, provider, model) DO UPDATE SET
+                           candidate = excluded.candidate,
+                           ats_score = excluded.ats_score,
+                           fit_score = excluded.fit_score,
+                           keyword_coverage = excluded.keyword_coverage,
+                           created_at = excluded.created_at,
+                           result = excluded.result
+                       RETURNING id""",
+                    (*key, rec.get("candidate", ""),
+                     as_int(result.get("ats_score")), as_int(result.get("fit_score")),
+                     as_float(result.get("keyword_coverage")), now, json.dumps(result)),
+                ).fetchone()[0]
+
+                conn.execute("DELETE FROM analysis_skills WHERE analysis_id = ?", (aid,))
+                postings = set()
+                for kind, field in ((MATCHED, "matched_skills"), (MISSING, "missing_skills")):
+                    for skill in result.get(field) or []:
+                        name = normalize_skill(skill)
+                        if name:
+                            postings.add((self._skill_id(conn, name), kind, aid))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO analysis_skills(skill_id, kind, analysis_id) VALUES (?, ?, ?)",
+                    postings,
+                )
+                ids.append(aid)
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def top_candidates(self, jd_hash: str = None, has: Iterable[str] = (), lacks: Iterable[str] = (),
+                       limit: int = 50, order_by: str = "fit_score", min_score: int = None,
+                       include_result: bool = False) -> List[Dict]:
+        """
+        Best analyses for a JD (or all JDs) ranked by order_by.
+        has   → skill is in matched_skills
+        lacks → skill is in missing_skills
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"order_by must be one of: {', '.join(ORDER_COLUMNS)}")
+
+        conn = self._conn()
+        where, args = [], []
+
+        if jd_hash:
+            where.append("a.jd_hash = ?")
+            args.append(jd_hash)
+
+        if min_score is not None:
+            where.append(f"a.{order_by} >= ?")
+            args.append(min_score)
+
+        for kind, skills in ((MATCHED, has), (MISSING, lacks)):
+            for skill in skills:
+                row = conn.execute(
+                    "SELECT id FROM skills WHERE name = ?", (normalize_skill(skill),)
+                ).fetchone()
+                if row is None:
+                    return []  # unknown skill → no analysis can match
+                where.append(
+                    "EXISTS (SELECT 1 FROM analysis_skills s WHERE s.skill_id = ? "
+                    "AND s.kind = ? AND s.analysis_id = a.id)"
+                )
+                args += [row[0], kind]
+
+        cols = "a.id, a.jd_hash, a.resume_hash, a.candidate, a.provider, a.model, " \
+               "a.ats_score, a.fit_score, a.keyword_coverage, a.created_at"
+        if include_result:
+            cols += ", a.result"
+
+        sql = f"SELECT {cols} FROM analyses a"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY a.{order_by} DESC, a.id LIMIT ?"
+        args.append(limit)
+
+        rows = []
+        for r in conn.execute(sql, args):
+            row = dict(r)
+            if include_result:
+                row["result"] = json.loads(row["result"])
+            rows.append(row)
+        return rows
+
+    def get(self, resume_hash: str, jd_hash: str, provider: str = "", model: str = "") -> Optional[Dict]:
+        row = self._conn().execute(
+            """SELECT result FROM analyses WHERE resume_hash = ? AND jd_hash = ?
+               AND provider = ? AND model = ?""",
+            (resume_hash, jd_hash, provider, model),
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def skill_counts(self, jd_hash: str, kind: int = MISSING, limit: int = 20) -> List[tuple]:
+        """
+        Most frequent matched / missing skills among a JD's candidates.
+        """
+        return [
+            tuple(r) for r in self._conn().execute(
+                """SELECT k.name, COUNT(*) AS n FROM analysis_skills s
+                   JOIN analyses a ON a.id = s.analysis_id
+                   JOIN skills k ON k.id = s.skill_id
+                   WHERE a.jd_hash = ? AND s.kind = ?
+                   GROUP BY k.name ORDER BY n DESC LIMIT ?""",
+                (jd_hash, kind, limit),
+            )
+        ]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
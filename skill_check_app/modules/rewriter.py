@@ -1,16 +1,23 @@
 import os
 from typing import List
-from modules.llm_switcher import call_model
+from modules.llm_switcher import call_model, is_error_response
 
 
 # ======================================================
 # Load HTML Resume Template
 # ======================================================
+TEMPLATES = ("minimal", "professional", "modern")
+
+
 def load_template(template_name: str) -> str:
     """
     Loads an HTML template from: skill_check_app/templates/<template>.html
     Template must contain {{CONTENT}} placeholder.
     """
+    if template_name not in TEMPLATES:
+        # Never build a path from an unknown name (e.g. "../../x")
+        return "{{CONTENT}}"
+
     template_path = os.path.join("skill_check_app", "templates", f"{template_name}.html")
 
     if not os.path.exists(template_path):
@@ -154,6 +161,10 @@ def rewrite_full_resume_html(
     except Exception as e:
         return f"<!-- Resume Rewrite Error: {str(e)} -->"
 
+    # Provider failure → same error marker, don't wrap it in a template
+    if is_error_response(html_content):
+        return f"<!-- Resume Rewrite Error: {html_content} -->"
+
     # Clean accidental code fences
     html_content = (
         html_content.replace("```html", "")
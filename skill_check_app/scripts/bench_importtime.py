@@ -0,0 +1,100 @@
+"""
+Import-time regression guard.
+
+Runs `python -X importtime` over the app's internal modules and fails
+(exit code 1) if a provider SDK / exporter dependency is imported eagerly
+or the cumulative import time exceeds the budget.
+
+Usage (from skill_check_app/):
+    python scripts/bench_importtime.py [--budget-ms 250] [--runs 3]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "modules.parser",
+    "modules.analyzer",
+    "modules.rewriter",
+    "modules.exporter",
+    "modules.llm_switcher",
+]
+
+# Must only be imported on first use
+LAZY_ONLY = [
+    "ollama",
+    "groq",
+    "google.generativeai",
+    "google.ai.generativelanguage",
+    "reportlab",
+    "bs4",
+    "docx",
+    "PyPDF2",
+]
+
+
+def measure() -> dict:
+    """
+    Returns {module_name: (cumulative_us, depth)} for one cold interpreter.
+    """
+    code = "import " + ", ".join(MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings[name.strip()] = (int(cumulative), depth)
+    return timings
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float,
+                    default=float(os.getenv("IMPORT_BUDGET_MS", "250")))
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    best = None
+    eager = set()
+    for _ in range(args.runs):
+        timings = measure()
+        # Only top-level entries, nested ones are already in their parent
+        total_us = sum(us for name, (us, depth) in timings.items()
+                       if depth == 0 and name in MODULES)
+        best = total_us if best is None else min(best, total_us)
+        eager |= {m for m in LAZY_ONLY if m in timings}
+
+    best_ms = best / 1000
+    print(f"internal modules import: {best_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(sorted(eager))}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
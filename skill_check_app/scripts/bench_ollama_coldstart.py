@@ -0,0 +1,145 @@
+"""
+Cold-start check for the Ollama manager against a local stub server.
+
+The stub mimics the Ollama HTTP API: the first request for a model (or a
+request with a different num_ctx) pays LOAD_S to "load" it, then each
+generation takes GEN_S. Four runs:
+
+    cold      call_ollama with nothing loaded (the old request path)
+    preload   manager.preload() at startup, then the first request
+    list      repeated fetch_ollama_models-style listing (server hits)
+    long      a long prompt grows num_ctx; later short prompts and
+              preloads must reuse that context instead of reloading
+
+    python skill_check_app/scripts/bench_ollama_coldstart.py
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOAD_S = float(os.getenv("STUB_LOAD_S", "2.0"))
+GEN_S = float(os.getenv("STUB_GEN_S", "0.2"))
+MODEL = "stub-model:latest"
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    loaded = {}  # model → num_ctx
+    lock = threading.Lock()
+    hits = {}
+    loads = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _ensure_loaded(self, model: str, num_ctx: int):
+        with self.lock:
+            if self.loaded.get(model) != num_ctx:
+                time.sleep(LOAD_S)  # (re)load: Ollama reloads on num_ctx change
+                self.loaded[model] = num_ctx
+                StubOllama.loads += 1
+
+    def do_GET(self):
+        StubOllama.hits[self.path] = StubOllama.hits.get(self.path, 0) + 1
+        if self.path == "/api/tags":
+            self._send({"models": [{"model": MODEL, "name": MODEL}]})
+        elif self.path == "/api/ps":
+            self._send({"models": [{"model": m, "name": m, "context_length": c} for m, c in self.loaded.items()]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        StubOllama.hits[self.path] = StubOllama.hits.get(self.path, 0) + 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        num_ctx = (body.get("options") or {}).get("num_ctx", 2048)
+        self._ensure_loaded(body["model"], num_ctx)
+
+        if self.path == "/api/generate":
+            if body.get("prompt"):
+                time.sleep(GEN_S)
+            self._send({"model": body["model"], "response": "", "done": True})
+        elif self.path == "/api/chat":
+            time.sleep(GEN_S)
+            self._send({"model": body["model"], "message": {"role": "assistant", "content": "ok"}, "done": True})
+        else:
+            self.send_error(404)
+
+
+def start_stub():
+    StubOllama.loaded = {}
+    StubOllama.hits = {}
+    StubOllama.loads = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    from modules import llm_switcher
+    from modules.llm_switcher import OllamaManager
+
+    prompt = "Analyze this resume against the JD. " * 50
+
+    # 1) Old path: nothing loaded, the first request pays the load
+    server, host = start_stub()
+    llm_switcher._ollama_manager = OllamaManager(host=host)
+    cold = timed(llm_switcher.call_ollama, MODEL, prompt)
+    server.shutdown()
+
+    # 2) Preload at "startup" while the user picks files, then analyze
+    server, host = start_stub()
+    manager = llm_switcher._ollama_manager = OllamaManager(host=host)
+    manager.preload(MODEL)
+    time.sleep(LOAD_S + 0.5)  # user think time
+    warm = timed(llm_switcher.call_ollama, MODEL, prompt)
+    second = timed(llm_switcher.call_ollama, MODEL, prompt)
+    loaded = manager.refresh_loaded()
+
+    # 3) Listing on every "rerun" hits the server once per TTL
+    for _ in range(20):
+        manager.list_models()
+    tag_hits = StubOllama.hits.get("/api/tags", 0)
+
+    # 4) One long prompt reloads at a larger num_ctx; what follows must not
+    loads_before = StubOllama.loads
+    llm_switcher.call_ollama(MODEL, prompt * 60)
+    for _ in range(3):
+        manager.preload(MODEL, wait=True)  # app.py preloads on every rerun
+        llm_switcher.call_ollama(MODEL, prompt)
+    reloads = StubOllama.loads - loads_before
+    server.shutdown()
+
+    print(f"stub: load {LOAD_S:.1f}s, generation {GEN_S:.1f}s")
+    print(f"cold first request:      {cold:.2f}s")
+    print(f"preloaded first request: {warm:.2f}s   (second: {second:.2f}s)")
+    print(f"loaded models:           {loaded}")
+    print(f"manager stats:           {manager.stats}")
+    print(f"/api/tags hits for 20 list_models() calls: {tag_hits}")
+    print(f"loads for 1 long + 3 short prompts (with preloads): {reloads}")
+
+    ok = (cold >= LOAD_S and warm < LOAD_S / 2 and tag_hits == 1 and reloads == 1
+          and manager.stats["cold_calls"] == 1)
+    print("OK" if ok else "FAIL: cold start still on the request path")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
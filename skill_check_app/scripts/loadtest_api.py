@@ -0,0 +1,132 @@
+"""
+Load test for api.py against the local fake provider (no network, no quota).
+
+Starts the API in a subprocess (unless --url is given), fires concurrent
+/analyze requests and reports throughput, latency percentiles and how
+many requests were shed with 429.
+
+Usage (from the repository root):
+    python skill_check_app/scripts/loadtest_api.py --requests 500 --concurrency 50
+    python skill_check_app/scripts/loadtest_api.py --fake-latency-ms 800 --llm-queue 16
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from collections import Counter
+
+import httpx
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESUME = """Jane Doe — Data Engineer
+Skills: python, sql, airflow, spark, docker
+Experience: built batch pipelines processing 2TB/day on spark and airflow.
+"""
+
+JD = """Senior Data Engineer
+Requirements: python, sql, spark, kubernetes, terraform, airflow.
+"""
+
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        API_PORT=str(args.port),
+        FAKE_LLM_LATENCY_MS=str(args.fake_latency_ms),
+        API_LLM_WORKERS=str(args.llm_workers),
+        API_LLM_QUEUE=str(args.llm_queue),
+    )
+    return subprocess.Popen(
+        [sys.executable, os.path.join(APP_DIR, "api.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API at {url} did not become ready")
+
+
+async def one_request(client: httpx.AsyncClient, url: str, i: int, args) -> tuple:
+    # Vary the resume so the shared analysis cache doesn't serve everything
+    resume = RESUME + f"\nApplicant #{i % args.unique}\n"
+    files = {
+        "resume": ("resume.txt", resume.encode(), "text/plain"),
+        "jd": ("jd.txt", JD.encode(), "text/plain"),
+    }
+    data = {"provider": "fake", "model": "fake-small"}
+
+    start = time.perf_counter()
+    resp = await client.post(f"{url}/analyze", files=files, data=data)
+    return resp.status_code, time.perf_counter() - start
+
+
+async def run(args) -> int:
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    server = None if args.url else start_server(args)
+
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            await wait_ready(client, url)
+
+            sem = asyncio.Semaphore(args.concurrency)
+
+            async def bounded(i):
+                async with sem:
+                    return await one_request(client, url, i, args)
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+            elapsed = time.perf_counter() - start
+
+            health = (await client.get(f"{url}/health")).json()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    codes = Counter(code for code, _ in results)
+    ok = sorted(lat for code, lat in results if code == 200)
+
+    def pct(p):
+        return ok[min(len(ok) - 1, int(p * len(ok)))] * 1000 if ok else 0.0
+
+    print(f"requests      : {args.requests} @ concurrency {args.concurrency}")
+    print(f"elapsed       : {elapsed:.2f} s  ({len(ok) / elapsed:.1f} ok req/s)")
+    print(f"status codes  : {dict(codes)}")
+    print(f"latency (ok)  : p50 {pct(0.50):.0f} ms  p95 {pct(0.95):.0f} ms  p99 {pct(0.99):.0f} ms")
+    print(f"pools         : {health}")
+
+    unexpected = set(codes) - {200, 429}
+    return 1 if unexpected else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", help="Use a running API instead of starting one")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--unique", type=int, default=10_000, help="Distinct resumes to cycle through")
+    ap.add_argument("--fake-latency-ms", type=float, default=300)
+    ap.add_argument("--llm-workers", type=int, default=16)
+    ap.add_argument("--llm-queue", type=int, default=64)
+    return asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Resumable bulk screening on the SQLite job queue (modules/jobqueue.py).
+
+    # enqueue (idempotent: re-running only adds new resumes)
+    python skill_check_app/scripts/screen_batch.py enqueue --jd JD.txt resumes/*.pdf \
+        --provider groq --model llama-3.3-70b-versatile --batch spring-hiring
+
+    # work (safe to kill and restart; completed LLM calls are not repeated)
+    python skill_check_app/scripts/screen_batch.py work --workers 8
+
+    python skill_check_app/scripts/screen_batch.py status
+    python skill_check_app/scripts/screen_batch.py requeue-dead
+
+    # stream zip / tar exports (or loose files) straight into the analyzer
+    python skill_check_app/scripts/screen_batch.py stream --jd JD.txt export.zip more.tar.gz \
+        --provider groq --model llama-3.3-70b-versatile
+
+    # also append analyses to an Arrow results directory (work / stream)
+    python skill_check_app/scripts/screen_batch.py --arrow outputs/results_arrow work
+    python skill_check_app/scripts/screen_batch.py --arrow outputs/results_arrow compact
+    # (compact and work --reclaim also add analyses a crashed worker
+    # finished but never flushed to the Arrow files)
+
+    # rank stored analyses (no LLM calls)
+    python skill_check_app/scripts/screen_batch.py top --jd JD.txt --has kubernetes --lacks terraform
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from modules.jobqueue import (JobQueue, STAGES, enqueue_batch, default_handlers, run_workers,
+                             parsed_text_hash, backfill_columnar)
+from modules.parser import parse_document_bytes
+from modules.result_store import ResultStore, ORDER_COLUMNS
+from modules.cache import content_hash
+from modules.dedup import Deduplicator
+from modules.ingest import analyze_ingested
+from modules.columnar import ColumnarWriter, compact
+
+
+def read_jd(path: str) -> str:
+    with open(path, "rb") as f:
+        return parse_document_bytes(os.path.basename(path), f.read())
+
+
+def main() -> int:
+    load_dotenv()
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.getenv("JOBQUEUE_DB", os.path.join("outputs", "jobs.db")))
+    ap.add_argument("--store", default=os.getenv("RESULT_STORE_DB", os.path.join("outputs", "results.db")))
+    ap.add_argument("--arrow", metavar="DIR", help="Also append analyses to Arrow IPC files in DIR")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    enq = sub.add_parser("enqueue")
+    enq.add_argument("resumes", nargs="+")
+    enq.add_argument("--jd", required=True)
+    enq.add_argument("--provider", default="groq")
+    enq.add_argument("--model", default="llama-3.3-70b-versatile")
+    enq.add_argument("--rewrite", action="store_true")
+    enq.add_argument("--template", default="professional")
+    enq.add_argument("--batch")
+
+    work = sub.add_parser("work")
+    work.add_argument("--workers", type=int, default=4)
+    work.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    work.add_argument("--visibility-timeout", type=float, default=300)
+    work.add_argument("--reclaim", action="store_true",
+                      help="Release leases left by a crashed run (no other workers running)")
+    work.add_argument("--dedup", type=float, metavar="THRESHOLD",
+                      help="Reuse analyses of near-duplicate resumes (e.g. 0.9)")
+
+    stream = sub.add_parser("stream")
+    stream.add_argument("sources", nargs="+", help="Archives (zip / tar / tar.gz) or documents")
+    stream.add_argument("--jd", required=True)
+    stream.add_argument("--provider", default="groq")
+    stream.add_argument("--model", default="llama-3.3-70b-versatile")
+    stream.add_argument("--concurrency", type=int, default=8)
+
+    sub.add_parser("compact", help="Recover rows missing from --arrow DIR and merge small parts (between runs)")
+
+    status = sub.add_parser("status")
+    status.add_argument("--batch")
+
+    dead = sub.add_parser("requeue-dead")
+    dead.add_argument("--stage", choices=STAGES)
+
+    top = sub.add_parser("top")
+    top.add_argument("--jd", help="JD file (omit to rank across all JDs)")
+    top.add_argument("--has", nargs="*", default=[])
+    top.add_argument("--lacks", nargs="*", default=[])
+    top.add_argument("--order-by", default="fit_score", choices=ORDER_COLUMNS)
+    top.add_argument("--limit", type=int, default=50)
+
+    args = ap.parse_args()
+
+    if args.cmd == "top":
+        jd_hash = content_hash(read_jd(args.jd)) if args.jd else None
+        rows = ResultStore(args.store).top_candidates(
+            jd_hash, has=args.has, lacks=args.lacks, limit=args.limit, order_by=args.order_by
+        )
+        for r in rows:
+            print(f"{r['fit_score']:>4} {r['ats_score']:>4}  {r['candidate']}")
+        return 0
+
+    if args.cmd == "compact":
+        if not args.arrow:
+            print("compact needs --arrow DIR")
+            return 1
+        if os.path.exists(args.db):
+            with ColumnarWriter(args.arrow) as columnar:
+                print(f"recovered {backfill_columnar(JobQueue(args.db), columnar)} rows from {args.db}")
+        print(compact(args.arrow))
+        return 0
+
+    if args.cmd == "stream":
+        jd_text = read_jd(args.jd)
+        if not jd_text.strip():
+            print(f"Could not parse JD: {args.jd}")
+            return 1
+        store = ResultStore(args.store)
+        columnar = ColumnarWriter(args.arrow) if args.arrow else None
+        jd_hash = content_hash(jd_text)
+        for name, result, meta in analyze_ingested(
+            args.sources, jd_text, args.provider, args.model,
+            groq_api_key=os.getenv("GROQ_API_KEY", ""),
+            gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
+            llm_concurrency=args.concurrency,
+        ):
+            if "error" in result:
+                print(f"  skip  {name}: {result['error']}")
+                continue
+            for sink in (store, columnar):
+                if sink is not None:
+                    sink.save(result, jd_hash=jd_hash, resume_hash=meta["text_hash"], candidate=name,
+                              provider=args.provider, model=args.model)
+            print(f"{result.get('fit_score', 0):>4} {result.get('ats_score', 0):>4}  {name}")
+        if columnar is not None:
+            columnar.close()
+        return 0
+
+    queue = JobQueue(args.db)
+
+    if args.cmd == "enqueue":
+        jd_text = read_jd(args.jd)
+        if not jd_text.strip():
+            print(f"Could not parse JD: {args.jd}")
+            return 1
+        print(enqueue_batch(queue, args.resumes, jd_text, args.provider, args.model,
+                            rewrite=args.rewrite, template=args.template, batch=args.batch))
+
+    elif args.cmd == "work":
+        columnar = ColumnarWriter(args.arrow) if args.arrow else None
+        if args.reclaim:
+            print(f"reclaimed {queue.reclaim_leases()} leases")
+            if columnar is not None:
+                print(f"recovered {backfill_columnar(queue, columnar)} Arrow rows")
+        dedup = None
+        if args.dedup:
+            dedup = Deduplicator(threshold=args.dedup)
+            # Seed with analyses finished by earlier runs
+            for done in queue.results("analyze"):
+                p = done["payload"]
+                text_hash = parsed_text_hash(queue, p["doc_hash"])
+                dedup.add(p["jd_hash"], text_hash, queue.get_text(text_hash), done["result"],
+                          provider=p["provider"], model=p["model"])
+
+        handlers = default_handlers(
+            queue,
+            groq_api_key=os.getenv("GROQ_API_KEY", ""),
+            gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
+            store=ResultStore(args.store),
+            dedup=dedup,
+            columnar=columnar,
+        )
+        try:
+            print(run_workers(queue, handlers, n=args.workers, stages=args.stages,
+                              visibility_timeout=args.visibility_timeout))
+        finally:
+            if columnar is not None:
+                columnar.close()
+        if dedup is not None:
+            print(f"dedup: {dedup.report()}")
+
+    elif args.cmd == "status":
+        print(json.dumps(queue.counts(args.batch), indent=2))
+
+    elif args.cmd == "requeue-dead":
+        print(f"requeued {queue.requeue_dead(args.stage)} jobs")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())